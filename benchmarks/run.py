@@ -0,0 +1,125 @@
+"""
+Benchmark lookups against large synthetic themes.
+
+Run from the repository root with ``python -m benchmarks.run`` (or ``make bench``). Results are written to stdout as
+one JSON object per line, the first describing the run and then one per measurement, e.g.::
+
+    {"benchmark": "lookup_hit", "n": 10000, "scenario": "cache", "unit": "us", "value": 12.5}
+
+Timings are the best of several repeats, per operation. Keys are sorted and benchmark names are stable, so output
+from two commits can be compared line by line.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess  # nosec
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+import freedesktop_icons
+from freedesktop_icons import Icon, get_theme, lookup, set_fallback_paths
+from freedesktop_icons.fallback import pixmap_index
+from freedesktop_icons.flat import _indexes as flat_indexes
+from freedesktop_icons.theme import Theme
+
+from .synthetic import SyntheticThemes, generate
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> tuple[float, int]:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number * 1e6, number
+
+
+def _reset():
+    get_theme.cache_clear()
+    pixmap_index.cache_clear()
+    flat_indexes.clear()
+    freedesktop_icons.set_result_cache(None)
+
+
+def run_scenario(themes: SyntheticThemes, repeat: int) -> Iterator[dict]:
+    os.environ.update(themes.environ())
+    set_fallback_paths([themes.pixmaps])
+    _reset()
+
+    def timing(name: str, fn: Callable[[], Any]) -> dict:
+        value, number = _time(fn, repeat)
+        return {"benchmark": name, "unit": "us", "value": round(value, 3), "n": number}
+
+    # First construction in this process, and then repeated constructions once the OS has the files cached
+    start = time.perf_counter()
+    Theme(themes.theme).base_dirs
+    yield {"benchmark": "theme_construct_first", "unit": "us", "value": round((time.perf_counter() - start) * 1e6, 3), "n": 1}
+    yield timing("theme_construct", lambda: Theme(themes.theme).base_dirs)
+    yield timing("theme_get_cached", lambda: get_theme(themes.theme))
+
+    # Memory for the whole chain, once loaded by a lookup that walks all of it
+    _reset()
+    tracemalloc.start()
+    lookup(themes.miss, themes.theme)
+    chain_bytes = tracemalloc.get_traced_memory()[0]
+    lookup(themes.hit, themes.theme, flatten=True)
+    flat_bytes = tracemalloc.get_traced_memory()[0] - chain_bytes
+    tracemalloc.stop()
+    yield {"benchmark": "memory_theme_chain", "unit": "bytes", "value": chain_bytes, "n": 1}
+    yield {"benchmark": "memory_flat_index", "unit": "bytes", "value": flat_bytes, "n": 1}
+
+    yield timing("lookup_hit", lambda: lookup(themes.hit, themes.theme))
+    yield timing("lookup_sized", lambda: lookup(Icon(themes.hit, size=40), themes.theme))
+    yield timing("lookup_deep_hit", lambda: lookup(themes.deep_hit, themes.theme))
+    yield timing("lookup_miss", lambda: lookup(themes.miss, themes.theme))
+    yield timing("lookup_fallback", lambda: lookup(themes.fallback_hit, themes.theme))
+    yield timing("lookup_generic_fallback", lambda: lookup(Icon(f"{themes.hit}-extra-specific", generic_fallback=True), themes.theme))
+    yield timing("lookup_flat_hit", lambda: lookup(themes.hit, themes.theme, flatten=True))
+    yield timing("lookup_flat_miss", lambda: lookup(themes.miss, themes.theme, flatten=True))
+
+    _reset()
+    start = time.perf_counter()
+    lookup(themes.hit, themes.theme, flatten=True)
+    yield {"benchmark": "flat_index_build", "unit": "us", "value": round((time.perf_counter() - start) * 1e6, 3), "n": 1}
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()  # nosec
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dirs", type=int, default=200, help="Directories in the first theme")
+    parser.add_argument("--icons", type=int, default=20000, help="Icon files in the first theme")
+    parser.add_argument("--bases", type=int, default=3, help="Base directories each theme is split across")
+    parser.add_argument("--depth", type=int, default=3, help="Length of the inheritance chain, not counting hicolor")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repeats, the best is reported")
+    parser.add_argument("--root", type=Path, help="Where to generate the themes (default: a temporary directory)")
+    args = parser.parse_args(argv)
+
+    params = {"dirs": args.dirs, "icons": args.icons, "bases": args.bases, "depth": args.depth}
+    meta = {"commit": _commit(), "python": platform.python_version(), "platform": sys.platform, **params}
+    print(json.dumps({"meta": meta}, sort_keys=True), flush=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.root or Path(tmp)
+        for scenario, with_cache in (("cache", True), ("nocache", False)):
+            themes = generate(
+                root / scenario, num_dirs=args.dirs, num_icons=args.icons, num_bases=args.bases, depth=args.depth, with_cache=with_cache
+            )
+            for result in run_scenario(themes, args.repeat):
+                print(json.dumps({"scenario": scenario, **result}, sort_keys=True), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Generate large synthetic icon themes to benchmark against.
+"""
+
+import os
+from pathlib import Path
+from typing import Optional
+
+import attr
+
+from freedesktop_icons.cache import GtkIconCache, write_icon_cache
+
+SIZES = (8, 16, 22, 24, 32, 48, 64, 96, 128, 256)
+CONTEXTS = ("actions", "apps", "categories", "devices", "emblems", "mimetypes", "places", "status", "panel", "legacy")
+
+
+@attr.s(auto_attribs=True)
+class SyntheticThemes:
+    """
+    Describes a generated set of themes, and the names of icons that are useful to look up in them.
+    """
+
+    root: Path
+    theme: str
+    """Name of the theme at the bottom of the inheritance chain"""
+    data_dirs: list[Path]
+    """Values for ``$XDG_DATA_DIRS``"""
+    home: Path
+    pixmaps: Path
+    hit: str
+    """An icon in the first theme"""
+    deep_hit: str
+    """An icon only in the last theme in the chain"""
+    fallback_hit: str
+    """An icon only in the pixmaps directory"""
+    miss: str = "no-such-icon-anywhere"
+
+    def environ(self) -> dict[str, str]:
+        return {"HOME": str(self.home), "XDG_DATA_DIRS": ":".join(map(str, self.data_dirs))}
+
+
+def _theme_dirs(num_dirs: int) -> list[tuple[str, int, str]]:
+    dirs = []
+    for i in range(num_dirs):
+        context = CONTEXTS[i % len(CONTEXTS)]
+        size = SIZES[(i // len(CONTEXTS)) % len(SIZES)]
+        scale = 1 + i // (len(CONTEXTS) * len(SIZES))
+        suffix = f"@{scale}" if scale > 1 else ""
+        dirs.append((f"{size}x{size}{suffix}/{context}", size, context))
+    return dirs
+
+
+def _write_theme(
+    bases: list[Path], name: str, inherits: Optional[str], num_dirs: int, num_icons: int, icon_prefix: str, with_cache: bool
+) -> list[str]:
+    dirs = _theme_dirs(num_dirs)
+
+    index = bases[0] / "icons" / name / "index.theme"
+    index.parent.mkdir(parents=True, exist_ok=True)
+    with index.open("w") as fh:
+        fh.write(f"[Icon Theme]\nName={name}\nDirectories={','.join(d for d, _, _ in dirs)}\n")
+        if inherits:
+            fh.write(f"Inherits={inherits}\n")
+        for dirname, size, context in dirs:
+            scale = dirname.split("@")[1].split("/")[0] if "@" in dirname else "1"
+            fh.write(f"\n[{dirname}]\nSize={size}\nScale={scale}\nContext={context.title()}\nType=Fixed\n")
+
+    # Spread the icons over the directories, each directory living in one of the base directories, with each icon
+    # name present at several sizes as in real themes.
+    per_dir = max(num_icons // num_dirs, 1)
+    names = [f"{icon_prefix}-{i}" for i in range(max(num_icons // len(SIZES), per_dir))]
+    cache_entries: list[dict[str, list[tuple[str, int]]]] = [{} for _ in bases]
+    flags = GtkIconCache.SUFFIX_FLAGS
+    for i, (dirname, _, _) in enumerate(dirs):
+        base_idx = i % len(bases)
+        path = bases[base_idx] / "icons" / name / dirname
+        path.mkdir(parents=True, exist_ok=True)
+        start = (i * per_dir) % len(names)
+        for j in range(per_dir):
+            icon = names[(start + j) % len(names)]
+            ext = "svg" if j % 4 == 0 else "png"
+            (path / f"{icon}.{ext}").touch()
+            cache_entries[base_idx].setdefault(icon, []).append((dirname, flags[ext]))
+
+    if with_cache:
+        for base, entries in zip(bases, cache_entries):
+            if (base / "icons" / name).is_dir():
+                write_icon_cache(base / "icons" / name, entries)
+    return names
+
+
+def generate(
+    root: Path,
+    *,
+    num_dirs: int = 200,
+    num_icons: int = 20000,
+    num_bases: int = 3,
+    depth: int = 3,
+    with_cache: bool = True,
+) -> SyntheticThemes:
+    """
+    Generate a chain of ``depth`` themes (plus ``hicolor``) under ``root``.
+
+    The first theme has ``num_dirs`` directories and ``num_icons`` icon files, spread across ``num_bases`` base
+    directories, and each theme it inherits from is a quarter of the size of the one before.
+    """
+    root = Path(root)
+    bases = [root / f"data{i}" for i in range(num_bases)]
+    names = [f"bench-{i}" for i in range(depth)]
+
+    first_names: list[str] = []
+    last_names: list[str] = []
+    for i, name in enumerate(names):
+        inherits = names[i + 1] if i + 1 < depth else "hicolor"
+        scale = 4**i
+        theme_names = _write_theme(
+            bases, name, inherits, max(num_dirs // scale, len(CONTEXTS)), max(num_icons // scale, 100), f"t{i}-icon", with_cache
+        )
+        if i == 0:
+            first_names = theme_names
+        last_names = theme_names
+    _write_theme(bases, "hicolor", None, len(CONTEXTS) * 4, 400, "hicolor-icon", with_cache)
+
+    pixmaps = root / "pixmaps"
+    pixmaps.mkdir(parents=True, exist_ok=True)
+    for i in range(200):
+        (pixmaps / f"pixmap-{i}.xpm").touch()
+
+    # ~/.icons exists but doesn't hold any of the themes, so it is probed but never matches
+    home = root / "home"
+    os.makedirs(home / ".icons", exist_ok=True)
+
+    return SyntheticThemes(
+        root=root,
+        theme=names[0],
+        data_dirs=bases,
+        home=home,
+        pixmaps=pixmaps,
+        hit=first_names[0],
+        deep_hit=last_names[0],
+        fallback_hit="pixmap-7",
+    )
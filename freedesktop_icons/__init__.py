@@ -3,15 +3,40 @@
 Find icon paths according to the freedesktop icon theme specification.
 """
 
+import hashlib
 import os
-from collections.abc import Iterator, Sequence
+import time
+from collections.abc import Iterable, Iterator, Sequence
 from functools import cache
 from pathlib import Path
-from typing import TYPE_CHECKING, Union
+from typing import TYPE_CHECKING, Optional, Union
+
+import attr
 
 if TYPE_CHECKING:  # pragma: no cover
+    from typing import Protocol
+
+    from .budget import Budget
+    from .context import SearchContext
     from .icons import Icon
-    from .theme import Theme
+    from .storage import ZipStorage
+    from .theme import Theme, ThemeInfo
+
+    class ResultCache(Protocol):
+        def get(self, key: str) -> Optional[str]:
+            ...
+
+        def set(self, key: str, value: str) -> None:
+            ...
+
+
+DEFAULT_EXTENSIONS = ("svg", "png", "xpm")
+"""File extensions searched for, in order of preference, when none are given"""
+
+_result_cache: "Optional[ResultCache]" = None
+_fallback_paths: Optional[list[Path]] = None
+_theme_storages: "dict[str, ZipStorage]" = {}
+_chain_generations: dict[tuple[str, str], tuple[float, str]] = {}
 
 
 def __getattr__(name):  # pragma: no cover
@@ -41,14 +66,101 @@ def __getattr__(name):  # pragma: no cover
 def get_theme(name: str) -> "Theme":  # pragma: no cover
     from .theme import Theme
 
+    if (storage := _theme_storages.get(name)) is not None:
+        return Theme(name, storage=storage)
     return Theme(name)
 
 
-def lookup(icon: Union[str, "Icon"], themename: str, extensions: Sequence[str] = ["svg", "png", "xpm"]) -> "Path | None":  # noqa: B006
+def add_theme_archive(path: Union[str, Path]) -> list[str]:
+    """
+    Make the themes in a zip archive available to :py:func:`lookup` and friends.
+
+    Each top-level directory in the archive with an ``index.theme`` is a theme, laid out as it would be on disk. A
+    theme in an archive is used instead of any theme of the same name in the :py:func:`theme_search_dirs`, and lookups
+    in it return :py:class:`zipfile.Path` objects rather than :py:class:`pathlib.Path`. See
+    :py:class:`~freedesktop_icons.storage.ZipStorage`.
+
+    Returns:
+        The names of the themes found in the archive
+    """
+    from .storage import ZipStorage
+
+    storage = ZipStorage(path)
+    names = storage.themes()
+    for name in names:
+        _theme_storages[name] = storage
+    get_theme.cache_clear()
+    return names
+
+
+def set_result_cache(cache: "Optional[ResultCache]") -> None:
+    """
+    Set (or with ``None``, remove) a cache of lookup results used by :py:func:`lookup`.
+
+    The cache is any object with ``get(key)`` and ``set(key, value)`` methods. Values are the matched path as a
+    string, or an empty string for a lookup that found nothing, and ``get`` returns ``None`` for keys it doesn't
+    have. See :py:class:`~freedesktop_icons.sharedcache.SharedResultCache` for a cache that can be shared between
+    forked worker processes.
+    """
+    global _result_cache
+    _result_cache = cache
+
+
+def result_key(
+    icon: "Icon", themename: str, extensions: Sequence[str], context: "Optional[SearchContext]" = None, generation: str = ""
+) -> str:
+    """
+    Return the key used to store the result of looking up ``icon`` in a result cache.
+
+    :meta private:
+    """
+    key = "\x1f".join((themename, ",".join(extensions), *map(str, attr.astuple(icon)), generation))
+    if context is not None:
+        key = f"{key}\x1f{context.key}"
+    return key
+
+
+def chain_generation(themename: str, context: "Optional[SearchContext]" = None) -> str:
+    """
+    Return a stamp that changes when any theme in the chain for ``themename``, or any fallback directory, changes.
+
+    This combines the :py:attr:`~freedesktop_icons.theme.Theme.generation` of each theme with the mtime of each
+    fallback directory. It is re-checked at most every :py:attr:`~freedesktop_icons.theme.Theme.RESCAN_INTERVAL`
+    seconds, so is cheap enough to include in the key of every cached result.
+
+    :meta private:
+    """
+    from .theme import Theme
+
+    now = time.monotonic()
+    cache_key = (themename, "" if context is None else context.key)
+    checked = _chain_generations.get(cache_key)
+    if checked is None or now - checked[0] >= Theme.RESCAN_INTERVAL:
+        mtimes = []
+        for dir in fallback_paths() if context is None else context.fallback_dirs:
+            try:
+                mtimes.append(os.stat(dir).st_mtime_ns)
+            except OSError:
+                mtimes.append(0)
+        generations = [theme.generation for theme in theme_chain(themename, context)]
+        stamp = hashlib.blake2b(repr((generations, mtimes)).encode("utf-8"), digest_size=8).hexdigest()
+        checked = _chain_generations[cache_key] = (now, stamp)
+    return checked[1]
+
+
+def lookup(
+    icon: Union[str, "Icon"],
+    themename: str,
+    extensions: Sequence[str] = DEFAULT_EXTENSIONS,
+    flatten: bool = False,
+    budget: "Optional[Budget]" = None,
+    context: "Optional[SearchContext]" = None,
+) -> "Path | None":
     """
     Lookup the specified icon in the theme and it's parents, returning the best match.
 
-    If the theme doesn't have this icon then the ``hicolor` theme is searched, and finally an icon is searched for in ``/usr/share/pixmaps``.
+    If the theme doesn't have this icon then the ``hicolor` theme is searched, and finally an icon is searched for in
+    the :py:func:`fallback_paths` (such as ``/usr/share/pixmaps``).
 
     For simple cases the icon name can be passed, but for more complex
     filtering (such as using an icon in a particular size) an instance of
@@ -71,11 +183,30 @@ def lookup(icon: Union[str, "Icon"], themename: str, extensions: Sequence[str] =
 
         lookup(Icon("org.mozilla.firefox", size=72), "Adwaita")
 
+    To fall back to less specific names (``network-wireless-signal``, then ``network-wireless`` etc.) if a specific
+    icon isn't found anywhere in the theme, as GTK does:
+
+    .. code-block:: python
+
+        lookup(Icon("network-wireless-signal-good", generic_fallback=True), "Adwaita")
+
+    If you are going to look up lots of icons by name alone (no size etc.) then passing ``flatten=True`` will build a
+    single table of every icon in the whole theme chain on first use (see :py:class:`~freedesktop_icons.flat.FlatIndex`),
+    after which those lookups don't touch the filesystem. Lookups with any other options set work as normal.
+
+    To bound the time spent on slow filesystems pass a :py:class:`~freedesktop_icons.budget.Budget`. If it runs out
+    the best match found so far is returned and ``budget.incomplete`` is set.
+
+    Themes are searched for in :py:func:`theme_search_dirs`, using the current environment, unless a
+    :py:class:`~freedesktop_icons.context.SearchContext` is given.
 
     Args:
         icon: icon name or object to search for
         themename: name of theme to start searching in
         extensions: List of file extensions to search for
+        flatten: Use a flattened index of the whole theme chain for lookups by name alone
+        budget: Limit on the filesystem probes made by this lookup
+        context: Where to search for themes and fallback icons
     Returns:
         path to best matching icon, or None
     """
@@ -84,48 +215,252 @@ def lookup(icon: Union[str, "Icon"], themename: str, extensions: Sequence[str] =
     if isinstance(icon, str):
         icon = Icon(icon)
 
-    theme = get_theme(themename)
+    if flatten and icon == Icon(icon.name):
+        from .flat import get_flat_index
 
-    if file := theme.lookup(icon, extensions):
+        return get_flat_index(themename, extensions, context).lookup(icon.name)
+
+    if _result_cache is None:
+        return _lookup(icon, themename, extensions, budget, context)
+
+    # Keyed on the chain's generation, so results from before icons were installed or removed aren't used
+    key = result_key(icon, themename, extensions, context, chain_generation(themename, context))
+    cached = _result_cache.get(key)
+    if cached is not None:
+        return Path(cached) if cached else None
+
+    file = _lookup(icon, themename, extensions, budget, context)
+    if budget is not None and budget.incomplete:
         return file
+    if file is None or isinstance(file, Path):
+        # Paths inside archives can't be recreated from a string, so those aren't cached
+        _result_cache.set(key, str(file) if file else "")
+    return file
+
+
+def theme_chain(themename: str, context: "Optional[SearchContext]" = None) -> Iterator["Theme"]:
+    """
+    Return the themes searched, in order, when looking up an icon in ``themename``.
+
+    This is the theme itself, the themes it inherits from, and finally ``hicolor``. Themes are loaded lazily, so
+    stopping early avoids loading the rest of the chain.
+
+    Args:
+        themename: name of theme to start searching in
+        context: Where to search for themes
+    """
+    load = get_theme if context is None else context.get_theme
+    theme = load(themename)
+    yield theme
 
     for parent in theme.parents:
-        theme = get_theme(parent)
+        yield load(parent)
 
-        if file := theme.lookup(icon, extensions):
+    yield load("hicolor")
+
+
+def _lookup(
+    icon: "Icon", themename: str, extensions: Sequence[str], budget: "Optional[Budget]" = None, context: "Optional[SearchContext]" = None
+) -> "Path | None":
+    for theme in theme_chain(themename, context):
+        if file := theme.lookup(icon, extensions, budget):
             return file
 
-    theme = get_theme("hicolor")
+    for name in icon.fallback_names():
+        # Symbolic and text direction variants are preferred here too
+        for variant in attr.evolve(icon, name=name, generic_fallback=False).variant_names():
+            # Each fallback directory is checked with one stat(2)
+            if budget is not None and not budget.spend():
+                return None
+            if file := lookup_fallback(variant, extensions, context):
+                return file
+    return None
 
-    if file := theme.lookup(icon, extensions):
-        return file
 
-    return lookup_fallback(icon.name, extensions)
+def lookup_many(
+    icons: Iterable[Union[str, "Icon"]],
+    themename: str,
+    extensions: Sequence[str] = DEFAULT_EXTENSIONS,
+    context: "Optional[SearchContext]" = None,
+) -> "list[Path | None]":
+    """
+    Lookup several icons in the same theme.
 
+    This is equivalent to calling :py:func:`lookup` for each icon, but is the entry point used by the command line
+    interface and is convenient when resolving a large batch of icons against a single theme.
 
-def lookup_fallback(icon_name: str, extensions: Sequence[str]):
-    for dir in fallback_paths():
-        for extension in extensions:
-            file = dir / f'{icon_name}.{extension}'
-            if file.exists():
-                return file
+    Args:
+        icons: icon names or objects to search for
+        themename: name of theme to start searching in
+        extensions: List of file extensions to search for
+        context: Where to search for themes and fallback icons
+    Returns:
+        path to best matching icon (or None) for each icon, in the same order
+    """
+    return [lookup(icon, themename, extensions, context=context) for icon in icons]
+
+
+def iter_icon_names(themename: str, prefix: str = "", context: "Optional[SearchContext]" = None) -> Iterator[str]:
+    """
+    Return the name of every icon that can be found from ``themename``.
+
+    This covers the theme, its parents, ``hicolor`` and the :py:func:`fallback_paths`, with each name returned only
+    once. Names are produced lazily, theme by theme, so the first results are available without reading the whole
+    chain.
+
+    Args:
+        themename: name of theme to start searching in
+        prefix: only return names starting with this
+        context: Where to search for themes and fallback icons
+    """
+    from .fallback import pixmap_index
+
+    seen: set[str] = set()
+
+    def unseen(names: Iterable[str]) -> Iterator[str]:
+        for name in names:
+            if name not in seen:
+                seen.add(name)
+                yield name
+
+    for theme in theme_chain(themename, context):
+        yield from unseen(theme.iter_icon_names(prefix))
+
+    for dir in fallback_paths() if context is None else context.fallback_dirs:
+        index = pixmap_index(Path(dir))
+        index.refresh()
+        yield from unseen(name for name in index.names if name.startswith(prefix))
+
+
+def search(prefix: str, themename: str, context: "Optional[SearchContext]" = None) -> Iterator[str]:
+    """
+    Return the names of icons that start with ``prefix`` and can be found from ``themename``.
+
+    See :py:func:`iter_icon_names`.
+    """
+    return iter_icon_names(themename, prefix, context)
+
+
+def lookup_fallback(icon_name: str, extensions: Sequence[str], context: "Optional[SearchContext]" = None) -> "Path | None":
+    """
+    Lookup an icon file directly inside one of the :py:func:`fallback_paths` (or the context's fallback directories).
+
+    Each fallback directory is indexed once, and re-indexed only when its mtime changes, so this doesn't need to
+    check each extension separately.
+
+    Args:
+        icon_name: name of the icon to search for
+        extensions: List of file extensions to search for, in order of preference
+        context: Where to search for fallback icons
+    """
+    from .fallback import pixmap_index
+
+    for dir in fallback_paths() if context is None else context.fallback_dirs:
+        if file := pixmap_index(Path(dir)).lookup(icon_name, extensions):
+            return file
+    return None
+
+
+def list_themes(max_workers: Optional[int] = None, context: "Optional[SearchContext]" = None) -> "list[ThemeInfo]":
+    """
+    Return every installed theme, sorted by name.
+
+    Each of the :py:func:`theme_search_dirs` is listed, and the themes in any archives added with
+    :py:func:`add_theme_archive` are included. Only the ``[Icon Theme]`` section of each ``index.theme`` is read, and
+    the directories and files are read in parallel, so this is quick even with many themes on a slow filesystem. As
+    with lookups, where a theme is in more than one place the first ``index.theme`` found is the one used.
+
+    Example
+    -------
+
+    .. code-block:: python
+
+        from freedesktop_icons import list_themes
+
+        for info in list_themes():
+            if not info.hidden:
+                print(info.name, info.display_name, info.inherits)
+
+        theme = info.load()
+
+    Args:
+        max_workers: Number of threads to read with, as for :py:class:`~concurrent.futures.ThreadPoolExecutor`
+        context: Where to search for themes
+    Returns:
+        a :py:class:`~freedesktop_icons.theme.ThemeInfo` for each theme
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from pathlib import PurePath, PurePosixPath
+
+    from .storage import FileStorage, Storage
+    from .theme import ThemeInfo
+
+    files = FileStorage() if context is None else context.storage
+
+    def scan(root: Path) -> list[tuple[str, Path]]:
+        try:
+            with os.scandir(root) as it:
+                return [(entry.name, root / entry.name) for entry in it if entry.is_dir()]
+        except OSError:
+            return []
+
+    def read(candidate: tuple[str, PurePath, Storage]) -> "Optional[ThemeInfo]":
+        name, path, storage = candidate
+        return ThemeInfo.read(name, path, storage, context)
+
+    with ThreadPoolExecutor(max_workers) as pool:
+        candidates: list[tuple[str, PurePath, Storage]] = [
+            (name, PurePosixPath(name), storage) for storage in dict.fromkeys(_theme_storages.values()) for name in storage.themes()
+        ]
+        for found in pool.map(scan, theme_search_dirs() if context is None else context.theme_dirs):
+            candidates.extend((name, path, files) for name, path in found)
+        infos = pool.map(read, candidates)
+
+        themes: dict[str, ThemeInfo] = {}
+        for info in infos:
+            if info is not None and info.name not in themes:
+                themes[info.name] = info
+    return sorted(themes.values(), key=lambda info: info.name)
 
 
 def theme_search_dirs() -> Iterator[Path]:
     """
     Return list of folders to search for themes in.
 
-    This is ``$HOME/.icons`` (for backwards compatibility), and then in exach directory in ``$XDG_DATA_DIRS/icons``.
+    This is ``$HOME/.icons`` (for backwards compatibility), then ``$XDG_DATA_HOME/icons``, and then in each
+    directory in ``$XDG_DATA_DIRS/icons``. Unset variables get their defaults from the XDG base directory
+    specification (``~/.local/share`` and ``/usr/local/share:/usr/share``).
+
+    The environment is read on every call. To fix the directories once, see
+    :py:class:`~freedesktop_icons.context.SearchContext`.
 
     Directories are not checked for existence.
     """
     # https://specifications.freedesktop.org/icon-theme-spec/icon-theme-spec-latest.html#directory_layout
-    yield Path.home() / '.icons'
-    for dir in os.environ.get('XDG_DATA_DIRS', '').split(':'):
-        if not dir:
-            continue
-        yield Path(dir) / 'icons'
+    from .context import dirs_from_environ
+
+    yield from dirs_from_environ().theme_dirs
+
+
+def set_fallback_paths(paths: Optional[Iterable[Union[str, Path]]]) -> None:
+    """
+    Override the directories searched by :py:func:`lookup_fallback` (or with ``None``, go back to the default).
+    """
+    global _fallback_paths
+    _fallback_paths = None if paths is None else [Path(p) for p in paths]
+
+
+def fallback_paths() -> Iterator[Path]:
+    """
+    Return the list of folders searched for icons that aren't in any theme.
+
+    Unless overridden by :py:func:`set_fallback_paths` this is ``pixmaps`` in each directory in ``$XDG_DATA_DIRS``
+    (by default ``/usr/local/share:/usr/share``), and finally ``/usr/share/pixmaps``.
+    """
+    if _fallback_paths is not None:
+        yield from _fallback_paths
+        return
 
+    from .context import dirs_from_environ
 
-def fallback_paths() -> Iterator[Path]:  # pragma: no cover
-    yield Path('/usr/share/pixmaps')
+    yield from dirs_from_environ().fallback_dirs
@@ -0,0 +1,236 @@
+"""
+Command line interface for freedesktop-icons.
+
+.. code-block:: console
+
+    $ echo '{"name": "org.mozilla.firefox", "size": 48}' | python -m freedesktop_icons resolve --theme Adwaita
+    {"name": "org.mozilla.firefox", "size": 48, "theme": "Adwaita", "path": "/usr/share/icons/hicolor/48x48/apps/org.mozilla.firefox.png"}
+"""
+
+import argparse
+import json
+import os
+import sys
+import zlib
+from collections import deque
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Optional, TextIO
+
+from . import DEFAULT_EXTENSIONS, icons, lookup_many
+
+
+def _resolve_batch(themename: str, batch: Sequence[icons.Icon], extensions: Sequence[str]) -> list[Optional[str]]:
+    # Runs in the worker processes. get_theme is cached per-process, so every worker keeps the themes it has been
+    # given warm for the lifetime of the pool.
+    return [str(path) if path else None for path in lookup_many(batch, themename, extensions)]
+
+
+# The JSON types allowed for each key of an icon spec. Icon doesn't check the types it is given, so a bad value would
+# otherwise only fail part way through a lookup.
+_SPEC_TYPES: dict[str, tuple[type, ...]] = {
+    "name": (str,),
+    "size": (int, type(None)),
+    "context": (str, type(None)),
+    "type": (str, type(None)),
+    "scale": (int,),
+    "threshold": (int,),
+    "generic_fallback": (bool,),
+    "symbolic": (bool,),
+    "direction": (str, type(None)),
+    "theme": (str,),
+}
+
+
+def _parse_spec(line: str, default_theme: Optional[str]) -> tuple[dict, Optional[str], Optional[icons.Icon]]:
+    try:
+        spec = json.loads(line)
+        if not isinstance(spec, dict):
+            raise ValueError("icon spec must be a JSON object")
+        for key, value in spec.items():
+            types = _SPEC_TYPES.get(key)
+            # bool is a subclass of int, but true isn't a size
+            if types is not None and (not isinstance(value, types) or isinstance(value, bool) and bool not in types):
+                raise ValueError(f"{key!r} must be {' or '.join('null' if t is type(None) else t.__name__ for t in types)}")
+        fields = dict(spec)
+        theme = fields.pop("theme", default_theme)
+        if not theme:
+            raise ValueError("no theme given, and no --theme default")
+        return spec, theme, icons.Icon(**fields)
+    except (TypeError, ValueError) as e:
+        return {"line": line.rstrip("\n"), "error": str(e)}, None, None
+
+
+def _shard(themename: str, jobs: int, n: int) -> int:
+    # Each theme starts on a worker picked by a stable hash (unlike hash(), which is randomized per-process), and its
+    # n-th batch goes to the n-th worker after that. A theme that only turns up in a few chunks is only loaded by a few
+    # workers, but the chunks of a catalogue that is mostly one theme are spread over all of them rather than leaving
+    # the others idle.
+    return (zlib.crc32(themename.encode("utf-8")) + n) % jobs
+
+
+def resolve(
+    lines: Iterable[str],
+    *,
+    theme: Optional[str] = None,
+    extensions: Sequence[str] = DEFAULT_EXTENSIONS,
+    jobs: int = 0,
+    chunk_size: int = 1024,
+) -> Iterator[dict]:
+    """
+    Resolve a stream of JSON icon specs, yielding one result per input line, in input order.
+
+    Each line is a JSON object with the keyword arguments for :py:class:`~freedesktop_icons.icons.Icon` (``name``,
+    ``size``, ``scale``, ``context`` etc.) and optionally a ``theme``. The result is the input object with a ``path``
+    key added, or an ``error`` key if the line could not be parsed or has a value of the wrong type.
+
+    Work is spread across ``jobs`` single-process workers, each of which loads (and keeps warm) the themes it is given.
+    Each chunk is split by theme, and successive batches for the same theme go to successive workers, so even a
+    catalogue that is all one theme uses every worker. At most ``2 * jobs`` chunks of ``chunk_size`` lines are in
+    flight at once, so memory use doesn't grow with the size of the input. With ``jobs=0`` everything is resolved in the current process.
+    """
+    if jobs <= 0:
+        for chunk in _chunks(lines, chunk_size):
+            yield from _resolve_chunk(chunk, theme, extensions)
+        return
+
+    workers = [ProcessPoolExecutor(max_workers=1) for _ in range(jobs)]
+    pending: deque = deque()
+    batches: dict[str, int] = {}
+    try:
+        for chunk in _chunks(lines, chunk_size):
+            pending.append(_submit_chunk(chunk, theme, extensions, workers, batches))
+            if len(pending) > 2 * jobs:
+                yield from _collect(*pending.popleft())
+        while pending:
+            yield from _collect(*pending.popleft())
+    finally:
+        for worker in workers:
+            worker.shutdown(cancel_futures=True)
+
+
+def _chunks(lines: Iterable[str], size: int) -> Iterator[list[str]]:
+    it = (line for line in lines if line.strip())
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def _group(chunk: list[str], default_theme: Optional[str]):
+    parsed = [_parse_spec(line, default_theme) for line in chunk]
+    by_theme: dict[str, list[int]] = {}
+    for idx, (_, themename, icon) in enumerate(parsed):
+        if themename is not None and icon is not None:
+            by_theme.setdefault(themename, []).append(idx)
+    return parsed, by_theme
+
+
+def _resolve_chunk(chunk: list[str], default_theme: Optional[str], extensions: Sequence[str]) -> list[dict]:
+    parsed, by_theme = _group(chunk, default_theme)
+    results: dict[int, Optional[str]] = {}
+    for themename, idxs in by_theme.items():
+        batch = [parsed[idx][2] for idx in idxs]
+        results.update(zip(idxs, _resolve_batch(themename, batch, extensions)))  # type: ignore
+    return _merge(parsed, results)
+
+
+def _submit_chunk(chunk: list[str], default_theme: Optional[str], extensions: Sequence[str], workers, batches: dict[str, int]) -> tuple:
+    # batches counts how many batches have been submitted so far for each theme
+    parsed, by_theme = _group(chunk, default_theme)
+    futures: list[tuple[list[int], Future]] = []
+    for themename, idxs in by_theme.items():
+        batch = [parsed[idx][2] for idx in idxs]
+        n = batches[themename] = batches.get(themename, -1) + 1
+        worker = workers[_shard(themename, len(workers), n)]
+        futures.append((idxs, worker.submit(_resolve_batch, themename, batch, list(extensions))))
+    return parsed, futures
+
+
+def _collect(parsed, futures: list[tuple[list[int], Future]]) -> list[dict]:
+    results: dict[int, Optional[str]] = {}
+    for idxs, future in futures:
+        results.update(zip(idxs, future.result()))
+    return _merge(parsed, results)
+
+
+def _merge(parsed, results: dict[int, Optional[str]]) -> list[dict]:
+    out = []
+    for idx, (spec, themename, icon) in enumerate(parsed):
+        if icon is None:
+            out.append(spec)
+        else:
+            out.append({**spec, "theme": themename, "path": results[idx]})
+    return out
+
+
+def _cmd_resolve(args: argparse.Namespace, stdin: TextIO, stdout: TextIO) -> int:
+    for result in resolve(stdin, theme=args.theme, extensions=args.extensions, jobs=args.jobs, chunk_size=args.chunk_size):
+        stdout.write(json.dumps(result))
+        stdout.write("\n")
+    stdout.flush()
+    return 0
+
+
+def _cmd_manifest(args: argparse.Namespace, stdin: TextIO, stdout: TextIO) -> int:
+    from .manifest import DEFAULT_SCALES, DEFAULT_SIZES, build_manifest, write_manifest
+
+    names = (line.strip() for line in stdin)
+    manifest = build_manifest(
+        filter(None, names),
+        args.theme,
+        sizes=args.sizes or DEFAULT_SIZES,
+        scales=args.scales or DEFAULT_SCALES,
+        extensions=args.extensions,
+    )
+    write_manifest(args.output, manifest)
+    return 0
+
+
+def _cmd_serve(args: argparse.Namespace, stdin: TextIO, stdout: TextIO) -> int:  # pragma: no cover
+    from .server import serve
+
+    serve(args.socket, cache_size=args.cache_size)
+    return 0
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m freedesktop_icons", description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    resolve_cmd = commands.add_parser("resolve", help="Resolve JSON-lines icon specs from stdin, writing JSON lines to stdout")
+    resolve_cmd.add_argument("--theme", help="Theme to use for specs that don't include a 'theme' key")
+    resolve_cmd.add_argument(
+        "--extension",
+        dest="extensions",
+        action="append",
+        help=f"File extension to search for, may be given multiple times (default: {', '.join(DEFAULT_EXTENSIONS)})",
+    )
+    resolve_cmd.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes, 0 to resolve in-process")
+    resolve_cmd.add_argument("--chunk-size", type=int, default=1024, help="Number of input lines dispatched at a time")
+    resolve_cmd.set_defaults(func=_cmd_resolve)
+
+    manifest_cmd = commands.add_parser("manifest", help="Resolve the icon names on stdin at fixed sizes and write a manifest file")
+    manifest_cmd.add_argument("--theme", required=True, help="Theme to resolve icons in")
+    manifest_cmd.add_argument("-o", "--output", required=True, help="File to write the manifest to")
+    manifest_cmd.add_argument("--size", dest="sizes", type=int, action="append", help="Icon size, may be given multiple times")
+    manifest_cmd.add_argument("--scale", dest="scales", type=int, action="append", help="Icon scale, may be given multiple times")
+    manifest_cmd.add_argument("--extension", dest="extensions", action="append", help="File extension to search for, may be given multiple times")
+    manifest_cmd.set_defaults(func=_cmd_manifest)
+
+    serve_cmd = commands.add_parser("serve", help="Answer lookups over a Unix domain socket, keeping themes and results warm")
+    serve_cmd.add_argument("--socket", help="Socket path (default: $XDG_RUNTIME_DIR/freedesktop-icons.sock)")
+    serve_cmd.add_argument("--cache-size", type=int, default=65536, help="Maximum number of lookup results to cache")
+    serve_cmd.set_defaults(func=_cmd_serve)
+
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None, stdin: TextIO = sys.stdin, stdout: TextIO = sys.stdout) -> int:
+    args = _parser().parse_args(argv)
+    if getattr(args, "extensions", None) is None:
+        args.extensions = DEFAULT_EXTENSIONS
+    return args.func(args, stdin, stdout)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Limits on how much filesystem access a lookup may do, and tracking of slow base directories.
+
+A lookup on a slow filesystem (an NFS mounted home directory, say) can stall on each ``stat(2)``. Passing a
+:py:class:`Budget` to :py:func:`~freedesktop_icons.lookup` bounds the number of probes it makes or the time it takes.
+
+A base directory (such as ``~/.icons``) where a single probe takes longer than :py:data:`SLOW_PROBE_SECONDS` is
+recorded as slow, and lookups with a budget skip it for the next :py:data:`SLOW_DIR_SKIP_SECONDS`, setting
+:py:attr:`Budget.incomplete`. Lookups without a budget always search every base directory.
+
+Only the search for an icon's file is bounded. Loading a theme -- finding its ``index.theme``, and checking which of
+its sub-directories exist in each base directory, which is repeated at most every
+:py:attr:`~freedesktop_icons.theme.Theme.RESCAN_INTERVAL` seconds -- is not counted against a budget, and is
+never skipped.
+"""
+
+import time
+from typing import Optional
+
+import attr
+
+SLOW_PROBE_SECONDS = 0.25
+"""A probe taking at least this long marks its base directory as slow"""
+SLOW_DIR_SKIP_SECONDS = 60.0
+"""How long a slow base directory is skipped for"""
+
+_slow_dirs: dict[str, float] = {}
+
+
+@attr.s(auto_attribs=True, eq=False)
+class Budget:
+    """
+    A limit on the filesystem probes made by a lookup.
+
+    Each check of whether a file exists counts as a probe. Answers that come from an icon cache, or from indexes that
+    are already built, are free and are still used once the budget has run out.
+
+    When the budget runs out the lookup stops probing and returns the best match found so far (or None), and
+    :py:attr:`incomplete` is set so the caller can tell the result might not be the one a full lookup would return.
+    A probe that is already in progress can't be interrupted, so the deadline can be overrun by one slow probe. Loading
+    a theme the first time it is used (and re-checking it every
+    :py:attr:`~freedesktop_icons.theme.Theme.RESCAN_INTERVAL` seconds) isn't counted, so isn't bounded by a budget.
+
+    Example
+    -------
+
+    .. code-block:: python
+
+        from freedesktop_icons import lookup
+        from freedesktop_icons.budget import Budget
+
+        budget = Budget(timeout=0.05)
+        path = lookup("org.mozilla.firefox", "Adwaita", budget=budget)
+        if budget.incomplete:
+            ...
+
+    A budget is used up by the lookups it is passed to, so use a new one for each lookup (or share one to limit a
+    group of lookups).
+
+    Args:
+        timeout: Seconds from now until the deadline
+        max_probes: Maximum number of probes
+    """
+
+    timeout: Optional[float] = None
+    max_probes: Optional[int] = None
+    probes: int = attr.ib(default=0, init=False)
+    """Number of probes made so far"""
+    incomplete: bool = attr.ib(default=False, init=False)
+    """Set when a lookup had to stop early because the budget ran out"""
+    deadline: Optional[float] = attr.ib(default=None, init=False, repr=False)
+    """The deadline, as a :py:func:`time.monotonic` time"""
+
+    def __attrs_post_init__(self):
+        if self.timeout is not None:
+            self.deadline = time.monotonic() + self.timeout
+
+    def spend(self) -> bool:
+        """
+        Account for a probe that is about to be made.
+
+        Returns:
+            False if the budget has run out, in which case the probe shouldn't be made
+        """
+        if self.incomplete:
+            return False
+        if (self.max_probes is not None and self.probes >= self.max_probes) or (self.deadline is not None and time.monotonic() >= self.deadline):
+            self.incomplete = True
+            return False
+        self.probes += 1
+        return True
+
+
+def record_probe(dir: str, seconds: float) -> None:
+    """
+    Record that a probe in the base directory ``dir`` took ``seconds``, marking it as slow if it took too long.
+
+    :meta private:
+    """
+    if seconds >= SLOW_PROBE_SECONDS:
+        _slow_dirs[dir] = time.monotonic() + SLOW_DIR_SKIP_SECONDS
+
+
+def is_slow(dir: str) -> bool:
+    """
+    Return whether the base directory ``dir`` should currently be skipped by lookups with a budget.
+
+    :meta private:
+    """
+    if not _slow_dirs:
+        return False
+    until = _slow_dirs.get(dir)
+    if until is None:
+        return False
+    if until > time.monotonic():
+        return True
+    _slow_dirs.pop(dir, None)
+    return False
+
+
+def slow_dirs() -> list[str]:
+    """Return the base directories that are currently being skipped because they were found to be slow."""
+    return [dir for dir in list(_slow_dirs) if is_slow(dir)]
+
+
+def clear_slow_dirs() -> None:
+    """Forget which base directories were found to be slow, so they are used again straight away."""
+    _slow_dirs.clear()
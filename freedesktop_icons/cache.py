@@ -1,7 +1,9 @@
 import ctypes
 import mmap
+import os
 import pathlib
 import struct
+from collections.abc import Mapping, Sequence
 from functools import cache
 from typing import Iterator
 
@@ -22,9 +24,13 @@ class GtkIconCache:
         theme_dir (pathlib.Path): Icon theme directory to look in
     """
 
-    theme_dir: pathlib.Path = attr.ib(converter=pathlib.Path)
+    theme_dir: pathlib.PurePath = attr.ib(converter=pathlib.Path)
     """Icon theme directory to look in"""
 
+    SUFFIX_FLAGS = {'xpm': 1, 'svg': 2, 'png': 4, 'symbolic.png': 16}
+    """Flag set on an image in the cache for each file extension present. ``symbolic.png`` is a symbolic icon
+    pre-rendered by ``gtk-encode-symbolic-svg``"""
+
     class Header(ctypes.BigEndianStructure):
         """:meta private:"""
 
@@ -43,8 +49,26 @@ class GtkIconCache:
         return self.data.__hash__()
 
     def __attrs_post_init__(self):
-        self.fh = (self.theme_dir / "icon-theme.cache").open("rb")
-        self.data = mmap.mmap(self.fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self.fh = open(self.theme_dir / "icon-theme.cache", "rb")
+        self._load(mmap.mmap(self.fh.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def from_bytes(cls, data: bytes, theme_dir: pathlib.PurePath) -> "GtkIconCache":
+        """
+        Read a cache from the contents of an ``icon-theme.cache`` file, for themes that aren't stored as loose files.
+
+        Args:
+            data: Contents of the cache file
+            theme_dir: Icon theme directory the cache describes
+        """
+        self = cls.__new__(cls)
+        self.theme_dir = theme_dir
+        self.fh = None
+        self._load(data)
+        return self
+
+    def _load(self, data):
+        self.data = data
         # ctypes cant re-use read-only buffers, but this is only 12 bytes
         self.header = self.Header.from_buffer_copy(self.data[0 : ctypes.sizeof(self.Header)])
 
@@ -104,6 +128,19 @@ class GtkIconCache:
         Returns:
             sub-directory names where this icon can be found
         """
+        for dirname, _ in self.lookup_flags(icon):
+            yield dirname
+
+    def lookup_flags(self, icon: str) -> Iterator[tuple[str, int]]:
+        """
+        Lookup a given icon name and return paths where this icon exists, along with which files are present.
+
+        Args:
+            icon: icon name to look up
+        Returns:
+            ``(sub-directory name, flags)`` for each directory where this icon can be found. The flags are a bitmask of
+            :py:attr:`SUFFIX_FLAGS` values for the file extensions present.
+        """
         hash = self._icon_hash_name(icon)
 
         bucket_idx = hash % self.num_hash_buckets
@@ -129,30 +166,86 @@ class GtkIconCache:
             val = self._read_cstring(name_offset)
             if val == icon:
                 # Found the matching bucket
-                image_list_offset = self._read_uint32(bucket_offset + 8)
-                list_len = self._read_uint32(image_list_offset)
-
-                for i in range(list_len):
-                    yield self._dir_name_from_index(self._read_uint16(image_list_offset + 4 + (8 * i)))
+                yield from self._images(self._read_uint32(bucket_offset + 8))
 
             # Read next pointer
             bucket_offset = self._read_uint32(bucket_offset)
 
-    def _all(self):  # pragma: no cover
+    def _images(self, image_list_offset: int) -> Iterator[tuple[str, int]]:
+        # Each image is a uint16 directory index, uint16 flags and uint32 image data offset
+        list_len = self._read_uint32(image_list_offset)
+        for i in range(list_len):
+            offset = image_list_offset + 4 + (8 * i)
+            yield self._dir_name_from_index(self._read_uint16(offset)), self._read_uint16(offset + 2)
+
+    def names(self) -> Iterator[str]:
+        """
+        Return the name of every icon in the cache.
+        """
         for bucket_idx in range(0, self.num_hash_buckets):
             bucket_offset = self._read_uint32(self.header.hash_offset + 4 + (bucket_idx * 4))
 
             while bucket_offset >= 0 and bucket_offset < len(self.data) - 12:
-                name_offset = self._read_uint32(bucket_offset + 4)
+                yield self._read_cstring(self._read_uint32(bucket_offset + 4))
+                bucket_offset = self._read_uint32(bucket_offset)
 
-                val = self._read_cstring(name_offset)
-                yield val
+    def _all(self) -> Iterator[tuple[str, list[tuple[str, int]]]]:
+        """Return every icon name in the cache, with the sub-directories it can be found in and their flags."""
+        for bucket_idx in range(0, self.num_hash_buckets):
+            bucket_offset = self._read_uint32(self.header.hash_offset + 4 + (bucket_idx * 4))
 
-                # Found the matching bucket
-                image_list_offset = self._read_uint32(bucket_offset + 8)
-                list_len = self._read_uint32(image_list_offset)
+            while bucket_offset >= 0 and bucket_offset < len(self.data) - 12:
+                name_offset = self._read_uint32(bucket_offset + 4)
 
-                yield (val, [self._dir_name_from_index(self._read_uint16(image_list_offset + 4 + (8 * i))) for i in range(list_len)])
+                yield (self._read_cstring(name_offset), list(self._images(self._read_uint32(bucket_offset + 8))))
 
                 # Read next pointer
                 bucket_offset = self._read_uint32(bucket_offset)
+
+
+def write_icon_cache(theme_dir: "os.PathLike[str] | str", icons: Mapping[str, Sequence[tuple[str, int]]], num_buckets: int = 0):
+    """
+    Write a version 1.0 ``icon-theme.cache`` file, as ``gtk-update-icon-cache`` would.
+
+    Only the parts of the format that :py:class:`GtkIconCache` reads are written (there is no image data). This is
+    for tests and benchmarks: to cache a real theme use ``gtk-update-icon-cache``.
+
+    Args:
+        theme_dir: Directory to write the cache in
+        icons: Mapping of icon name to ``(sub-directory, flags)`` for each directory the icon is in
+        num_buckets: Number of hash buckets, defaults to the number of icons
+    """
+    dirs = sorted({dirname for images in icons.values() for dirname, _ in images})
+    dir_idx = {dirname: i for i, dirname in enumerate(dirs)}
+    num_buckets = num_buckets or max(len(icons), 1)
+
+    buf = bytearray(12)
+    hash_offset = len(buf)
+    buf += struct.pack(">L", num_buckets) + b"\xff" * 4 * num_buckets
+
+    def string(value: str) -> int:
+        offset = len(buf)
+        buf.extend(value.encode("utf-8") + b"\x00")
+        buf.extend(b"\x00" * (-len(buf) % 4))
+        return offset
+
+    for name, images in icons.items():
+        image_list_offset = len(buf)
+        buf += struct.pack(">L", len(images))
+        for dirname, flags in images:
+            buf += struct.pack(">HHL", dir_idx[dirname], flags, 0)
+        name_offset = string(name)
+
+        # Prepend to the bucket's chain
+        bucket = hash_offset + 4 + 4 * (GtkIconCache._icon_hash_name(name) % num_buckets)
+        node_offset = len(buf)
+        buf += buf[bucket : bucket + 4] + struct.pack(">LL", name_offset, image_list_offset)
+        buf[bucket : bucket + 4] = struct.pack(">L", node_offset)
+
+    dir_list_offset = len(buf)
+    buf += struct.pack(">L", len(dirs)) + b"\x00" * 4 * len(dirs)
+    for i, dirname in enumerate(dirs):
+        struct.pack_into(">L", buf, dir_list_offset + 4 + 4 * i, string(dirname))
+
+    struct.pack_into(">HHLL", buf, 0, 1, 0, hash_offset, dir_list_offset)
+    (pathlib.Path(theme_dir) / "icon-theme.cache").write_bytes(bytes(buf))
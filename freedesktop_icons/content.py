@@ -0,0 +1,240 @@
+"""
+Read the contents of icons, with a bounded in-memory cache.
+
+Serving icons (over HTTP, say) usually means a :py:func:`~freedesktop_icons.lookup` followed by opening and reading
+the file on every request. :py:func:`read_icon` and :py:func:`open_icon` do both, answering from a
+:py:class:`ContentCache`:
+
+* Small files are kept in a least-recently-used cache bounded by total size in bytes.
+* Large files (most often big SVGs) are memory mapped instead, so their contents are shared with the OS page cache
+  rather than copied.
+
+Every read checks the file's mtime and size, so an icon that is updated on disk is re-read.
+"""
+
+import io
+import mmap
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import BinaryIO, NamedTuple, Optional, Union
+
+from . import DEFAULT_EXTENSIONS, lookup
+from .icons import Icon
+
+Content = Union[bytes, memoryview]
+
+
+class ContentCacheInfo(NamedTuple):
+    entries: int
+    """Number of files whose contents are cached"""
+    bytes: int
+    """Total size of the cached contents"""
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    """Number of files dropped from the cache to make room for others"""
+    mapped: int
+    """Number of large files currently memory mapped"""
+
+
+class ContentCache:
+    """
+    Cache of icon file contents.
+
+    Files smaller than ``mmap_threshold`` bytes are read into memory and kept, least recently used first out, until
+    the total exceeds ``max_bytes``. Larger files are memory mapped, keeping at most ``max_mapped`` of them mapped at
+    a time, and returned as a :py:class:`memoryview` of the mapping.
+
+    Entries are checked against the file's path, mtime and size on every read. Icons from a theme in an archive (see
+    :py:func:`~freedesktop_icons.add_theme_archive`) are checked against the archive's mtime, and are always read
+    into memory.
+
+    It is safe to use from several threads.
+
+    Args:
+        max_bytes: Maximum total size of the contents kept in memory
+        mmap_threshold: Files of at least this many bytes are memory mapped instead
+        max_mapped: Maximum number of files kept memory mapped
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, mmap_threshold: int = 256 * 1024, max_mapped: int = 64):
+        self.max_bytes = max_bytes
+        self.mmap_threshold = mmap_threshold
+        self.max_mapped = max_mapped
+        self._entries: OrderedDict[str, tuple[int, int, bytes]] = OrderedDict()
+        self._mapped: OrderedDict[str, tuple[int, int, mmap.mmap]] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def read(self, path: Union[str, "os.PathLike[str]", zipfile.Path]) -> Content:
+        """
+        Return the contents of the file at ``path``, from the cache if it hasn't changed.
+
+        Returns:
+            The contents as :py:class:`bytes`, or for large files a :py:class:`memoryview`
+        """
+        if isinstance(path, zipfile.Path):
+            return self._read_archived(path)
+
+        key = os.fspath(path)
+        st = os.stat(key)
+        if st.st_size and st.st_size >= self.mmap_threshold:
+            return memoryview(self._map(key, st.st_mtime_ns, st.st_size))
+
+        data = self._get(key, st.st_mtime_ns, st.st_size)
+        if data is None:
+            with open(key, 'rb') as fh:
+                data = fh.read()
+            self._put(key, st.st_mtime_ns, st.st_size, data)
+        return data
+
+    def open(self, path: Union[str, "os.PathLike[str]", zipfile.Path]) -> BinaryIO:
+        """
+        Return a binary file object for the contents of the file at ``path``.
+
+        Small files are read from the cache, and large files get their own memory mapping.
+        """
+        if not isinstance(path, zipfile.Path):
+            key = os.fspath(path)
+            st = os.stat(key)
+            if st.st_size and st.st_size >= self.mmap_threshold:
+                with open(key, 'rb') as fh:
+                    return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)  # type: ignore
+        return io.BytesIO(self.read(path))
+
+    def _read_archived(self, path: zipfile.Path) -> bytes:
+        zf = path.root
+        if zf.filename is None:
+            # An archive that isn't a file has no mtime to check entries against
+            return path.read_bytes()
+        key = f'{zf.filename}/{path.at}'
+        mtime = os.stat(zf.filename).st_mtime_ns
+        size = zf.getinfo(path.at).file_size
+
+        data = self._get(key, mtime, size)
+        if data is None:
+            data = path.read_bytes()
+            self._put(key, mtime, size, data)
+        return data
+
+    def _get(self, key: str, mtime: int, size: int) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[:2] == (mtime, size):
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[2]
+            self._misses += 1
+            return None
+
+    def _put(self, key: str, mtime: int, size: int, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if (old := self._entries.pop(key, None)) is not None:
+                self._bytes -= len(old[2])
+            self._entries[key] = (mtime, size, data)
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._evictions += 1
+
+    def _map(self, key: str, mtime: int, size: int) -> mmap.mmap:
+        with self._lock:
+            entry = self._mapped.get(key)
+            if entry is not None and entry[:2] == (mtime, size):
+                self._mapped.move_to_end(key)
+                self._hits += 1
+                return entry[2]
+            self._misses += 1
+
+        with open(key, 'rb') as fh:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        with self._lock:
+            self._mapped[key] = (mtime, size, mapped)
+            self._mapped.move_to_end(key)
+            while len(self._mapped) > self.max_mapped:
+                # Not closed explicitly, as callers may still hold a memoryview of it: it is unmapped once they don't
+                self._mapped.popitem(last=False)
+                self._evictions += 1
+        return mapped
+
+    def cache_info(self) -> ContentCacheInfo:
+        """Return how full the cache is, and hit, miss and eviction counts."""
+        with self._lock:
+            return ContentCacheInfo(
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_bytes=self.max_bytes,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                mapped=len(self._mapped),
+            )
+
+    def clear(self):
+        """Empty the cache and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._mapped.clear()
+            self._bytes = self._hits = self._misses = self._evictions = 0
+
+
+default_cache = ContentCache()
+"""The cache used by :py:func:`read_icon` and :py:func:`open_icon` when one isn't given"""
+
+
+def read_icon(
+    icon: Union[str, Icon], themename: str, extensions: Sequence[str] = DEFAULT_EXTENSIONS, cache: Optional[ContentCache] = None
+) -> Optional[Content]:
+    """
+    Lookup an icon, as :py:func:`~freedesktop_icons.lookup` does, and return the contents of the file.
+
+    Example
+    -------
+
+    .. code-block:: python
+
+        from freedesktop_icons.content import read_icon
+
+        data = read_icon(Icon("org.mozilla.firefox", size=48), "Adwaita")
+
+    Args:
+        icon: icon name or object to search for
+        themename: name of theme to start searching in
+        extensions: List of file extensions to search for
+        cache: Cache to read through, defaults to :py:data:`default_cache`
+    Returns:
+        The file contents as :py:class:`bytes` (or a :py:class:`memoryview` for large files), or None if the icon
+        wasn't found
+    """
+    path = lookup(icon, themename, extensions)
+    if path is None:
+        return None
+    return (cache or default_cache).read(path)
+
+
+def open_icon(
+    icon: Union[str, Icon], themename: str, extensions: Sequence[str] = DEFAULT_EXTENSIONS, cache: Optional[ContentCache] = None
+) -> Optional[BinaryIO]:
+    """
+    Lookup an icon, as :py:func:`~freedesktop_icons.lookup` does, and return a binary file object of its contents.
+
+    Takes the same arguments as :py:func:`read_icon`.
+
+    Returns:
+        A file object, or None if the icon wasn't found
+    """
+    path = lookup(icon, themename, extensions)
+    if path is None:
+        return None
+    return (cache or default_cache).open(path)
@@ -0,0 +1,156 @@
+"""
+Explicit search environments, for looking up icons for more than one user or layout in one process.
+
+By default lookups read ``$HOME``, ``$XDG_DATA_HOME`` and ``$XDG_DATA_DIRS`` from the environment, and share one
+cache of themes for the whole process. A :py:class:`SearchContext` fixes all of these once instead, and has its own
+cache of themes, so a server can serve several tenants with different layouts side by side by passing a context to
+:py:func:`~freedesktop_icons.lookup`.
+"""
+
+import os
+from collections.abc import Iterable, Mapping
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple, Optional, Union
+
+import attr
+
+from .storage import FileStorage
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .theme import Theme
+
+DEFAULT_DATA_DIRS = (Path('/usr/local/share'), Path('/usr/share'))
+"""Used when ``$XDG_DATA_DIRS`` is unset or empty, as the XDG base directory specification says"""
+DEFAULT_FALLBACK_DIR = Path('/usr/share/pixmaps')
+
+
+def _paths(paths: Iterable[Union[str, Path]]) -> tuple[Path, ...]:
+    return tuple(map(Path, paths))
+
+
+def _split(value: Optional[str]) -> list[Path]:
+    # The spec says relative paths are invalid and should be ignored
+    return [Path(dir) for dir in (value or '').split(':') if dir and os.path.isabs(dir)]
+
+
+def _theme_dirs(home: Path, data_dirs: Iterable[Path]) -> tuple[Path, ...]:
+    return tuple(dict.fromkeys([home / '.icons', *(dir / 'icons' for dir in data_dirs)]))
+
+
+class XdgDirs(NamedTuple):
+    """The directories given by an environment, as returned by :py:func:`dirs_from_environ`."""
+
+    home: Path
+    data_dirs: tuple[Path, ...]
+    theme_dirs: tuple[Path, ...]
+    fallback_dirs: tuple[Path, ...]
+
+
+@lru_cache(maxsize=16)
+def _xdg_dirs(home: Optional[str], data_home: Optional[str], data_dirs: Optional[str]) -> XdgDirs:
+    home_dir = Path(home) if home else Path.home()
+    data_home_dirs = _split(data_home) or [home_dir / '.local' / 'share']
+    dirs = _split(data_dirs) or list(DEFAULT_DATA_DIRS)
+    fallback_dirs = [path for dir in dirs if (path := dir / 'pixmaps') != DEFAULT_FALLBACK_DIR]
+    all_data_dirs = (*data_home_dirs[:1], *dirs)
+    return XdgDirs(home_dir, all_data_dirs, _theme_dirs(home_dir, all_data_dirs), (*fallback_dirs, DEFAULT_FALLBACK_DIR))
+
+
+def dirs_from_environ(environ: Optional[Mapping[str, str]] = None) -> XdgDirs:
+    """
+    Return the directories given by ``$HOME``, ``$XDG_DATA_HOME`` and ``$XDG_DATA_DIRS``, as
+    :py:meth:`SearchContext.from_environ` uses.
+
+    This is what :py:func:`~freedesktop_icons.theme_search_dirs` and :py:func:`~freedesktop_icons.fallback_paths`
+    return. The result is remembered for the last few values of the variables, so this is cheap to call for every
+    lookup.
+
+    Args:
+        environ: Environment to read, defaults to :py:data:`os.environ`
+    """
+    if environ is None:
+        environ = os.environ
+    return _xdg_dirs(environ.get('HOME'), environ.get('XDG_DATA_HOME'), environ.get('XDG_DATA_DIRS'))
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class SearchContext:
+    """
+    Where to look for themes and fallback icons.
+
+    Themes are searched for in ``home/.icons`` and then ``icons`` in each of ``data_dirs``. Icons that aren't in any
+    theme are searched for directly in each of ``fallback_dirs``.
+
+    Contexts are immutable, and normally created from environment variables with :py:meth:`from_environ`. Each one
+    keeps the themes it loads (see :py:meth:`get_theme`), so create a context once and reuse it.
+
+    Example
+    -------
+
+    .. code-block:: python
+
+        from freedesktop_icons import lookup
+        from freedesktop_icons.context import SearchContext
+
+        tenant = SearchContext.from_environ({"HOME": "/home/alice", "XDG_DATA_DIRS": "/opt/alice/share"})
+        lookup("org.mozilla.firefox", "Adwaita", context=tenant)
+
+    Args:
+        home: Home directory
+        data_dirs: Data directories, most important first: normally ``$XDG_DATA_HOME`` followed by ``$XDG_DATA_DIRS``
+        fallback_dirs: Directories searched for icons that aren't in any theme
+    """
+
+    home: Path = attr.ib(converter=Path)
+    data_dirs: tuple[Path, ...] = attr.ib(converter=_paths)
+    fallback_dirs: tuple[Path, ...] = attr.ib(converter=_paths)
+    theme_dirs: tuple[Path, ...] = attr.ib(init=False, eq=False, repr=False)
+    """The directories searched for themes, in order"""
+    key: str = attr.ib(init=False, eq=False, repr=False)
+    """A string identifying the directories searched, used to keep results for different contexts apart"""
+    storage: FileStorage = attr.ib(init=False, eq=False, repr=False)
+    """Reads themes from :py:attr:`theme_dirs`"""
+    _themes: dict[str, "Theme"] = attr.ib(init=False, factory=dict, eq=False, repr=False)
+
+    @theme_dirs.default
+    def _default_theme_dirs(self) -> tuple[Path, ...]:
+        return _theme_dirs(self.home, self.data_dirs)
+
+    @key.default
+    def _key(self) -> str:
+        return ':'.join(map(str, (*self.theme_dirs, '', *self.fallback_dirs)))
+
+    @storage.default
+    def _file_storage(self) -> FileStorage:
+        return FileStorage(search_dirs=self.theme_dirs)
+
+    @classmethod
+    def from_environ(cls, environ: Optional[Mapping[str, str]] = None) -> "SearchContext":
+        """
+        Create a context from ``$HOME``, ``$XDG_DATA_HOME`` and ``$XDG_DATA_DIRS``.
+
+        Unset variables get the defaults from the XDG base directory specification: ``~/.local/share`` and
+        ``/usr/local/share:/usr/share``. The fallback directories are ``pixmaps`` in each of ``$XDG_DATA_DIRS``, then
+        ``/usr/share/pixmaps``.
+
+        Args:
+            environ: Environment to read, defaults to :py:data:`os.environ`
+        """
+        dirs = dirs_from_environ(environ)
+        return cls(dirs.home, dirs.data_dirs, dirs.fallback_dirs)
+
+    def get_theme(self, name: str) -> "Theme":
+        """Return the theme called ``name`` as found in this context, loading it on first use."""
+        theme = self._themes.get(name)
+        if theme is None:
+            from . import _theme_storages
+            from .theme import Theme
+
+            storage = _theme_storages.get(name) or self.storage
+            theme = self._themes.setdefault(name, Theme(name, storage=storage))
+        return theme
+
+    def clear(self):
+        """Forget the themes loaded in this context."""
+        self._themes.clear()
@@ -0,0 +1,71 @@
+import os
+from collections.abc import Sequence
+from functools import cache
+from pathlib import Path
+from typing import Optional
+
+import attr
+
+
+@attr.s(auto_attribs=True, hash=False, eq=False)
+class PixmapIndex:
+    """
+    Index of the icon files directly inside a fallback directory such as ``/usr/share/pixmaps``.
+
+    The directory is read once with :py:func:`os.scandir` into a mapping of icon name to the extensions present, and
+    is only re-read when the directory's mtime changes, so a lookup costs a single ``stat(2)`` of the directory no
+    matter how many extensions are asked for.
+
+    Args:
+        path (pathlib.Path): Directory to index
+    """
+
+    path: Path = attr.ib(converter=Path)
+    names: dict[str, set[str]] = attr.ib(factory=dict, init=False, repr=False)
+    mtime_ns: Optional[int] = attr.ib(default=None, init=False, repr=False)
+
+    def refresh(self):
+        """Re-read the directory if it has changed since it was last indexed."""
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+
+        if mtime_ns == self.mtime_ns:
+            return
+
+        names: dict[str, set[str]] = {}
+        if mtime_ns is not None:
+            try:
+                with os.scandir(self.path) as it:
+                    for entry in it:
+                        name, dot, ext = entry.name.rpartition('.')
+                        if dot and name and entry.is_file():
+                            names.setdefault(name, set()).add(ext)
+            except OSError:
+                pass
+        self.names = names
+        self.mtime_ns = mtime_ns
+
+    def lookup(self, icon_name: str, extensions: Sequence[str]) -> Optional[Path]:
+        """
+        Find ``icon_name`` with the first of ``extensions`` that exists in this directory.
+
+        Returns:
+            Path of the icon file, or None
+        """
+        self.refresh()
+
+        found = self.names.get(icon_name)
+        if not found:
+            return None
+        for ext in extensions:
+            if ext in found:
+                return self.path / f'{icon_name}.{ext}'
+        return None
+
+
+@cache
+def pixmap_index(path: Path) -> PixmapIndex:
+    """Return the (shared) :py:class:`PixmapIndex` for ``path``."""
+    return PixmapIndex(path)
@@ -0,0 +1,137 @@
+import os
+import time
+from collections.abc import Callable, Iterable, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import attr
+
+from . import fallback_paths, theme_chain
+from .fallback import pixmap_index
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .context import SearchContext
+    from .theme import BaseDir, Theme
+
+
+@attr.s(auto_attribs=True, eq=False)
+class FlatIndex:
+    """
+    A single name to path table for un-sized lookups across a whole theme chain.
+
+    When an icon is looked up by name alone (no size, context, type or scale) the answer only depends on the theme
+    chain and the extensions, so this merges the answer from every theme in the chain -- the theme, its parents,
+    ``hicolor`` and then the fallback directories, with the first one in chain order winning -- into one dict. A
+    lookup is then a single dict probe, with no filesystem access at all.
+
+    To keep it compact each entry is stored as one small integer encoding an index into a table of (shared) directory
+    prefixes and an index into the extensions, rather than as a path. Each prefix also records how to turn it into a
+    path, for themes that aren't stored as loose files (see :py:mod:`freedesktop_icons.storage`).
+
+    As a guide, for a synthetic theme of 40k icon files in 300 directories building the index takes around 0.5s
+    (dominated by listing each directory once) and it uses around 4.5MB when all 40k names are distinct, or 0.3s and
+    0.5MB when the same 4k names are present at 10 sizes each. The memory is almost all the dict itself.
+
+    Built with :py:meth:`build`, and normally used via ``lookup(..., flatten=True)``.
+    """
+
+    themename: str
+    extensions: tuple[str, ...]
+    prefixes: list[str] = attr.ib(repr=False)
+    codes: dict[str, int] = attr.ib(repr=False)
+    _to_path: list[Callable[[str], Path]] = attr.ib(repr=False)
+    _themes: list[tuple["Theme", list["BaseDir"]]] = attr.ib(repr=False)
+    _fallbacks: list[tuple[Path, Optional[int]]] = attr.ib(repr=False)
+    _checked_at: float = attr.ib(factory=time.monotonic, repr=False)
+    _context: Optional["SearchContext"] = attr.ib(default=None, repr=False)
+
+    @classmethod
+    def build(cls, themename: str, extensions: Sequence[str], context: Optional["SearchContext"] = None) -> "FlatIndex":
+        """Build the index for ``themename`` by reading every theme in its chain, as found in ``context``."""
+        extensions = tuple(extensions)
+        prefixes: list[str] = []
+        prefix_idx: dict[str, int] = {}
+        to_path: list[Callable[[str], Path]] = []
+        codes: dict[str, int] = {}
+        num_exts = len(extensions)
+
+        def add(name: str, prefix: str, ext: int, make_path: Callable[[str], Path] = Path):
+            if name in codes:
+                return
+            if (idx := prefix_idx.get(prefix)) is None:
+                idx = prefix_idx[prefix] = len(prefixes)
+                prefixes.append(prefix)
+                to_path.append(make_path)
+            codes[name] = idx * num_exts + ext
+
+        themes = []
+        for theme in theme_chain(themename, context):
+            themes.append((theme, theme.base_dirs))
+            for name, prefix, i in theme._default_icon_files(extensions):
+                add(name, prefix, i, theme.storage.path)
+
+        fallbacks = []
+        for dir in _fallback_dirs(context):
+            index = pixmap_index(Path(dir))
+            index.refresh()
+            fallbacks.append((index.path, index.mtime_ns))
+            prefix = f'{index.path}{os.sep}'
+            for name, found in index.names.items():
+                for i, ext in enumerate(extensions):
+                    if ext in found:
+                        add(name, prefix, i)
+                        break
+
+        return cls(themename, extensions, prefixes, codes, to_path, themes, fallbacks, context=context)
+
+    def lookup(self, name: str) -> "Path | None":
+        """Return the path for the icon called ``name``, as :py:func:`~freedesktop_icons.lookup` would, or None."""
+        code = self.codes.get(name)
+        if code is None:
+            return None
+        idx, ext = divmod(code, len(self.extensions))
+        return self._to_path[idx](f'{self.prefixes[idx]}{name}.{self.extensions[ext]}')
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def is_current(self) -> bool:
+        """
+        Check if any theme in the chain, or any fallback directory, has changed since the index was built.
+
+        This is checked at most every :py:attr:`Theme.RESCAN_INTERVAL <freedesktop_icons.theme.Theme.RESCAN_INTERVAL>`
+        seconds.
+        """
+        from .theme import Theme
+
+        now = time.monotonic()
+        if now - self._checked_at < Theme.RESCAN_INTERVAL:
+            return True
+        self._checked_at = now
+
+        if any(theme.base_dirs is not bases for theme, bases in self._themes):
+            return False
+        fallbacks = []
+        for dir in _fallback_dirs(self._context):
+            index = pixmap_index(Path(dir))
+            index.refresh()
+            fallbacks.append((index.path, index.mtime_ns))
+        return fallbacks == self._fallbacks
+
+
+def _fallback_dirs(context: Optional["SearchContext"]) -> Iterable[Path]:
+    return fallback_paths() if context is None else context.fallback_dirs
+
+
+_indexes: dict[tuple[str, tuple[str, ...], Optional[str]], FlatIndex] = {}
+
+
+def get_flat_index(themename: str, extensions: Sequence[str], context: Optional["SearchContext"] = None) -> FlatIndex:
+    """
+    Return the (shared) :py:class:`FlatIndex` for a theme and list of extensions, building or rebuilding it if needed.
+    """
+    key = (themename, tuple(extensions), None if context is None else context.key)
+    index = _indexes.get(key)
+    if index is None or not index.is_current():
+        index = _indexes[key] = FlatIndex.build(themename, extensions, context)
+    return index
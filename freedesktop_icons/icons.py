@@ -1,3 +1,4 @@
+from collections.abc import Iterator
 from enum import Enum
 from typing import Optional
 
@@ -29,6 +30,52 @@ class Icon:
         converter=attr.converters.optional(str.lower),  # type: ignore
         default=None,
     )
-    type: Optional[Type] = None
+    type: Optional[Type] = attr.ib(converter=attr.converters.optional(Type), default=None)  # type: ignore
     scale: int = 1
     threshold: int = 2
+    generic_fallback: bool = False
+    """If the icon isn't found, try less specific names by removing ``-`` separated parts from the end of the name"""
+    symbolic: bool = False
+    """Prefer the symbolic (``-symbolic``) variant of the icon, if the theme has one"""
+    direction: Optional[str] = attr.ib(
+        converter=attr.converters.optional(str.lower),  # type: ignore
+        validator=attr.validators.optional(attr.validators.in_(("ltr", "rtl"))),
+        default=None,
+    )
+    """Text direction, ``"ltr"`` or ``"rtl"``, to prefer the ``-ltr`` or ``-rtl`` variant of the icon"""
+
+    def fallback_names(self) -> Iterator[str]:
+        """
+        Names to search for, most specific first.
+
+        This is just the icon name unless :py:attr:`generic_fallback` is set, in which case it is followed by
+        each shorter name made by removing the last ``-`` separated part:
+
+        >>> list(Icon("network-wireless-signal-good", generic_fallback=True).fallback_names())
+        ['network-wireless-signal-good', 'network-wireless-signal', 'network-wireless', 'network']
+        """
+        name = self.name
+        yield name
+        if not self.generic_fallback:
+            return
+        while (idx := name.rfind('-')) > 0:
+            name = name[:idx]
+            yield name
+
+    def variant_names(self) -> Iterator[str]:
+        """
+        Names to search for in place of :py:attr:`name`, in order of preference.
+
+        This is just the icon name unless :py:attr:`symbolic` or :py:attr:`direction` is set, in which case the
+        variants are tried first, as GTK does:
+
+        >>> list(Icon("go-next", symbolic=True, direction="rtl").variant_names())
+        ['go-next-symbolic-rtl', 'go-next-symbolic', 'go-next-rtl', 'go-next']
+        """
+        names = [self.name]
+        if self.symbolic and not self.name.endswith('-symbolic'):
+            names.insert(0, f'{self.name}-symbolic')
+        for name in names:
+            if self.direction:
+                yield f'{name}-{self.direction}'
+            yield name
@@ -0,0 +1,176 @@
+"""
+Precomputed lookup results for a known set of icons.
+
+Deployments that always need the same icons at the same sizes can resolve them all once, at build time, with
+:py:func:`build_manifest` (or ``python -m freedesktop_icons manifest``) and then answer lookups at runtime from the
+resulting file with a :py:class:`ManifestResolver`, without touching the icon themes at all.
+
+The manifest is a JSON document::
+
+    {
+      "version": 1,
+      "theme": "Adwaita",
+      "extensions": ["svg", "png", "xpm"],
+      "generations": {"Adwaita": [...], "hicolor": [...]},
+      "fallbacks": [["/usr/share/pixmaps", 1624300000000000000]],
+      "dirs": ["/usr/share/icons/Adwaita/16x16/apps/", ...],
+      "icons": {"org.mozilla.firefox": [[16, 1, 0, 1], [16, 2, -1, -1], ...]}
+    }
+
+where each icon entry is ``[size, scale, index into dirs, index into extensions]``, and -1 marks an icon that wasn't
+found. Icons found in a theme stored in an archive (see :py:func:`~freedesktop_icons.add_theme_archive`) are left
+out, so they are always looked up live. ``generations`` holds :py:attr:`Theme.generation <freedesktop_icons.theme.Theme.generation>` for every theme in
+the chain, to detect when the manifest is stale.
+"""
+
+import json
+import os
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Optional, Union
+
+from . import DEFAULT_EXTENSIONS, fallback_paths, lookup, theme_chain
+from .icons import Icon
+
+VERSION = 1
+DEFAULT_SIZES = (16, 22, 24, 32, 48, 64, 96, 128, 256)
+DEFAULT_SCALES = (1, 2)
+
+
+def _generations(themename: str) -> dict[str, list[int]]:
+    return {theme.name: list(theme.generation) for theme in theme_chain(themename)}
+
+
+def _fallback_stamps() -> list[list]:
+    stamps: list[list] = []
+    for dir in fallback_paths():
+        try:
+            stamps.append([str(dir), os.stat(dir).st_mtime_ns])
+        except OSError:
+            stamps.append([str(dir), 0])
+    return stamps
+
+
+def build_manifest(
+    names: Iterable[str],
+    themename: str,
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    scales: Sequence[int] = DEFAULT_SCALES,
+    extensions: Sequence[str] = DEFAULT_EXTENSIONS,
+) -> dict:
+    """
+    Resolve every combination of ``names``, ``sizes`` and ``scales`` with :py:func:`~freedesktop_icons.lookup` and
+    return the manifest.
+
+    Args:
+        names: icon names to resolve
+        themename: name of theme to start searching in
+        sizes: icon sizes to resolve each icon at
+        scales: scales to resolve each size at
+        extensions: List of file extensions to search for
+    """
+    extensions = list(extensions)
+    dirs: list[str] = []
+    dir_idx: dict[str, int] = {}
+    entries: dict[str, list[list[int]]] = {}
+
+    for name in names:
+        if name in entries:
+            continue
+        results = entries[name] = []
+        for size in sizes:
+            for scale in scales:
+                path = lookup(Icon(name, size=size, scale=scale), themename, extensions)
+                if path is None:
+                    results.append([size, scale, -1, -1])
+                    continue
+                if not isinstance(path, Path):
+                    continue
+                dir = f'{path.parent}{os.sep}'
+                if (idx := dir_idx.get(dir)) is None:
+                    idx = dir_idx[dir] = len(dirs)
+                    dirs.append(dir)
+                results.append([size, scale, idx, extensions.index(path.suffix[1:])])
+
+    return {
+        "version": VERSION,
+        "theme": themename,
+        "extensions": extensions,
+        "generations": _generations(themename),
+        "fallbacks": _fallback_stamps(),
+        "dirs": dirs,
+        "icons": entries,
+    }
+
+
+def write_manifest(path: Union[str, Path], manifest: dict):
+    """Write a manifest from :py:func:`build_manifest` to a file."""
+    with open(path, "w") as fh:
+        json.dump(manifest, fh, separators=(",", ":"))
+
+
+class ManifestResolver:
+    """
+    Answer lookups from a manifest, falling back to a normal lookup for anything not in it.
+
+    Lookups for an icon name, size and scale that are in the manifest are answered without any filesystem access.
+    Anything else -- unknown names or sizes, or icons with other options such as ``context`` set -- is passed to
+    :py:func:`~freedesktop_icons.lookup`.
+
+    If ``verify`` is set (the default) the generation stamps of the themes are checked when the resolver is created,
+    and if any of them have changed since the manifest was built it is not used at all (see :py:attr:`stale`).
+
+    Example
+    -------
+
+    .. code-block:: python
+
+        from freedesktop_icons.manifest import ManifestResolver
+
+        resolver = ManifestResolver.load("icons.manifest.json")
+        resolver.lookup(Icon("org.mozilla.firefox", size=48, scale=2))
+
+    Args:
+        manifest: A manifest, as returned by :py:func:`build_manifest`
+        verify: Check if the manifest is out of date
+    """
+
+    def __init__(self, manifest: dict, verify: bool = True):
+        if manifest.get("version") != VERSION:
+            raise ValueError(f"Unsupported manifest version {manifest.get('version')!r}")
+        self.manifest = manifest
+        self.themename: str = manifest["theme"]
+        self.extensions: list[str] = manifest["extensions"]
+        self._dirs: list[str] = manifest["dirs"]
+        self._entries: dict[tuple[str, int, int], tuple[int, int]] = {
+            (name, size, scale): (dir_idx, ext_idx) for name, results in manifest["icons"].items() for size, scale, dir_idx, ext_idx in results
+        }
+        self.stale = verify and self.is_stale()
+        """Whether the manifest was found to be out of date, in which case all lookups are done live"""
+
+    @classmethod
+    def load(cls, path: Union[str, Path], verify: bool = True) -> "ManifestResolver":
+        """Load a manifest written by :py:func:`write_manifest`."""
+        with open(path) as fh:
+            return cls(json.load(fh), verify=verify)
+
+    def is_stale(self) -> bool:
+        """Check if any theme in the chain, or the fallback directories, have changed since the manifest was built."""
+        return _generations(self.themename) != self.manifest["generations"] or _fallback_stamps() != self.manifest["fallbacks"]
+
+    def lookup(self, icon: Union[str, Icon]) -> "Path | None":
+        """
+        Lookup an icon in the manifest's theme, as :py:func:`~freedesktop_icons.lookup` would.
+        """
+        if isinstance(icon, str):
+            icon = Icon(icon)
+
+        if not self.stale and icon == Icon(icon.name, size=icon.size, scale=icon.scale):
+            found: Optional[tuple[int, int]] = self._entries.get((icon.name, icon.size, icon.scale))  # type: ignore
+            if found is not None:
+                dir_idx, ext_idx = found
+                if dir_idx < 0:
+                    return None
+                return Path(f'{self._dirs[dir_idx]}{icon.name}.{self.extensions[ext_idx]}')
+
+        return lookup(icon, self.themename, self.extensions)
@@ -0,0 +1,217 @@
+"""
+Local lookup daemon and client.
+
+Lots of short-lived processes each resolving a handful of icons all pay the cost of parsing ``index.theme`` files and
+opening icon caches. :py:class:`LookupServer` keeps that state (and a cache of results) warm in one long-lived
+process per host, and answers batched lookups over a Unix domain socket. :py:class:`Client` mirrors the signatures of
+:py:func:`~freedesktop_icons.lookup` and :py:func:`~freedesktop_icons.lookup_many`.
+
+The wire protocol is one JSON object per line in each direction. A request looks like::
+
+    {"theme": "Adwaita", "icons": [{"name": "edit-copy", "size": 16}], "extensions": ["svg", "png"]}
+
+and the response is either ``{"paths": ["/usr/share/icons/Adwaita/16x16/actions/edit-copy.png"]}`` or
+``{"error": "..."}``.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import tempfile
+from collections.abc import Iterable, Sequence
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+import attr
+
+from . import DEFAULT_EXTENSIONS, chain_generation, lookup
+from .icons import Icon
+
+
+def default_socket_path() -> Path:
+    """
+    Return the default socket path for the lookup server.
+
+    This is ``$XDG_RUNTIME_DIR/freedesktop-icons.sock``, or a per-user file in the temporary directory if
+    ``XDG_RUNTIME_DIR`` is not set. As another user could create a socket at that name first, :py:class:`Client`
+    checks that the server it connects to is run by the same user.
+    """
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return Path(runtime_dir) / 'freedesktop-icons.sock'
+    return Path(tempfile.gettempdir()) / f'freedesktop-icons-{os.getuid()}.sock'
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "LookupServer"
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = {"paths": self.server.resolve_request(json.loads(line))}
+            except (TypeError, ValueError, KeyError) as e:
+                response = {"error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class LookupServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serve icon lookups over a Unix domain socket.
+
+    Themes are loaded via :py:func:`~freedesktop_icons.get_theme` and so stay loaded for the life of the process, and
+    the most recent ``cache_size`` results are remembered.
+
+    Results are remembered along with the :py:attr:`~freedesktop_icons.theme.Theme.generation` of each theme in the
+    chain and the mtime of each fallback directory, checked at most every
+    :py:attr:`~freedesktop_icons.theme.Theme.RESCAN_INTERVAL` seconds, so installing or removing icons (and updating
+    the icon cache, as packages normally do) is picked up without restarting the server.
+
+    Args:
+        socket_path: Path of the socket to listen on. A stale socket file left over at this path is removed.
+        cache_size: Maximum number of lookup results to keep
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Union[str, Path], cache_size: int = 65536):
+        socket_path = Path(socket_path)
+        try:
+            if stat.S_ISSOCK(socket_path.lstat().st_mode):
+                socket_path.unlink()
+        except FileNotFoundError:
+            pass
+        super().__init__(str(socket_path), _Handler)
+        self.socket_path = socket_path
+        self._lookup = lru_cache(maxsize=cache_size)(self._lookup_uncached)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _lookup_uncached(themename: str, extensions: tuple[str, ...], fields: tuple, generation: str) -> Optional[str]:
+        # generation is only part of the key, so results from before the theme changed are never used
+        icon = Icon(*fields)
+        path = lookup(icon, themename, extensions)
+        return str(path) if path else None
+
+    def resolve_request(self, request: dict) -> list[Optional[str]]:
+        """
+        Resolve a single decoded request, returning the paths (as strings) in the same order as ``request["icons"]``.
+
+        :meta private:
+        """
+        themename = request["theme"]
+        extensions = tuple(request.get("extensions") or DEFAULT_EXTENSIONS)
+        generation = chain_generation(themename)
+        result = []
+        for spec in request["icons"]:
+            icon = Icon(spec) if isinstance(spec, str) else Icon(**spec)
+            result.append(self._lookup(themename, extensions, attr.astuple(icon), generation))
+        return result
+
+    def cache_info(self):
+        """Return hit/miss statistics for the result cache, as from :py:func:`functools.lru_cache`."""
+        return self._lookup.cache_info()
+
+
+def serve(socket_path: Union[str, Path, None] = None, cache_size: int = 65536):  # pragma: no cover
+    """Run a :py:class:`LookupServer` until interrupted."""
+    with LookupServer(socket_path or default_socket_path(), cache_size=cache_size) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+class Client:
+    """
+    Thin client for a :py:class:`LookupServer`.
+
+    The connection is opened on first use and re-used for subsequent requests. Clients can be used as a context
+    manager to close the connection when done.
+
+    Only a server run by the same user is trusted: :py:class:`PermissionError` is raised if the process listening on
+    the socket (or where that can't be found, the socket file) belongs to anyone else.
+
+    Example
+    -------
+
+    .. code-block:: python
+
+        from freedesktop_icons.server import Client
+
+        with Client() as client:
+            client.lookup("org.mozilla.firefox", "Adwaita")
+    """
+
+    def __init__(self, socket_path: Union[str, Path, None] = None, timeout: Optional[float] = 5.0):
+        self.socket_path = Path(socket_path or default_socket_path())
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._rfile: Optional[BinaryIO] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._sock is not None:
+            self._rfile.close()  # type: ignore
+            self._sock.close()
+            self._sock = None
+            self._rfile = None
+
+    def _check_owner(self, sock: socket.socket):
+        if hasattr(socket, "SO_PEERCRED"):
+            # The credentials of the process that is actually listening, which can't be faked by replacing the file
+            _, uid, _ = struct.unpack("3i", sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")))
+        else:  # pragma: no cover
+            uid = os.stat(self.socket_path).st_uid
+        if uid != os.getuid():
+            raise PermissionError(f"{self.socket_path}: server is run by uid {uid}, not this user")
+
+    def _request(self, request: dict) -> dict:
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(str(self.socket_path))
+            try:
+                self._check_owner(sock)
+            except PermissionError:
+                sock.close()
+                raise
+            self._sock = sock
+            self._rfile = sock.makefile("rb")
+        self._sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        line = self._rfile.readline()  # type: ignore
+        if not line:
+            self.close()
+            raise ConnectionError(f"{self.socket_path}: connection closed by server")
+        return json.loads(line)
+
+    def lookup(self, icon: Union[str, Icon], themename: str, extensions: Sequence[str] = DEFAULT_EXTENSIONS) -> "Path | None":
+        """Remote version of :py:func:`freedesktop_icons.lookup`."""
+        return self.lookup_many([icon], themename, extensions)[0]
+
+    def lookup_many(
+        self, icons: Iterable[Union[str, Icon]], themename: str, extensions: Sequence[str] = DEFAULT_EXTENSIONS
+    ) -> "list[Path | None]":
+        """Remote version of :py:func:`freedesktop_icons.lookup_many`."""
+        specs = [icon if isinstance(icon, str) else attr.asdict(icon) for icon in icons]
+        response = self._request({"theme": themename, "icons": specs, "extensions": list(extensions)})
+        if "error" in response:
+            raise ValueError(response["error"])
+        return [Path(path) if path else None for path in response["paths"]]
@@ -0,0 +1,170 @@
+"""
+A lookup result cache in shared memory, for pre-fork worker pools.
+"""
+
+import hashlib
+import multiprocessing
+import struct
+from multiprocessing import shared_memory
+from typing import Optional
+
+
+class SharedResultCache:
+    """
+    Cache of lookup results stored in a :py:class:`multiprocessing.shared_memory.SharedMemory` block.
+
+    Create it in the parent process (optionally pre-populating it) *before* forking workers: every worker then reads
+    and writes the same fixed-size block, so memory use doesn't grow with the number of workers and a result found by
+    one worker is a hit for all the others. Install it with :py:func:`~freedesktop_icons.set_result_cache`.
+
+    Example
+    -------
+
+    .. code-block:: python
+
+        import freedesktop_icons
+        from freedesktop_icons.sharedcache import SharedResultCache
+
+        cache = SharedResultCache.create()
+        freedesktop_icons.set_result_cache(cache)
+        # Pre-populate with icons we know we'll need
+        freedesktop_icons.lookup_many(["org.mozilla.firefox", "org.gnome.Nautilus"], "Adwaita")
+        # ... fork workers ...
+
+    The layout is a header, an open-addressing hash table of fixed 16 byte slots, and an append-only arena holding
+    the key and value bytes. A slot is ``(key hash: u64, arena offset: u32, key length: u16, value length: u16)``
+    and its hash is written last, so readers don't need to take the lock: once a slot is visible it never changes.
+    Writers are serialized by a :py:func:`multiprocessing.Lock`. When the table or arena is full new results are
+    simply not stored.
+
+    Entries are never replaced. Instead :py:func:`~freedesktop_icons.lookup` includes the generation of the theme
+    chain in each key, so results from before icons were installed or removed are no longer used; they only take up
+    space until the cache is recreated.
+
+    Args:
+        shm: The shared memory block, already initialized
+        lock: Lock to serialize writers
+    """
+
+    HEADER = struct.Struct("<4sHHII")
+    # Mutable part of the header: arena bytes used, number of entries
+    STATE = struct.Struct("<II")
+    SLOT = struct.Struct("<QIHH")
+    MAGIC = b"FDIC"
+    VERSION = 1
+    # Keep probe sequences short
+    MAX_LOAD = 0.75
+
+    def __init__(self, shm: shared_memory.SharedMemory, lock):
+        self.shm = shm
+        self.lock = lock
+        self.buf = self._buffer(shm)
+        magic, version, _, self.num_slots, self.arena_size = self.HEADER.unpack_from(self.buf, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"{shm.name} is not a version {self.VERSION} shared result cache")
+        self._slots_offset = self.HEADER.size + self.STATE.size
+        self._arena_offset = self._slots_offset + self.num_slots * self.SLOT.size
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def create(cls, num_slots: int = 65536, arena_size: int = 8 * 1024 * 1024, name: Optional[str] = None) -> "SharedResultCache":
+        """
+        Allocate and initialize a new shared cache.
+
+        Args:
+            num_slots: Number of hash table slots; at most 75% of them will be used
+            arena_size: Bytes available to store keys and values
+            name: Name of the shared memory block, default is to pick a unique one
+        """
+        size = cls.HEADER.size + cls.STATE.size + num_slots * cls.SLOT.size + arena_size
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        # New shared memory is zero-filled, so every slot starts out empty
+        cls.HEADER.pack_into(cls._buffer(shm), 0, cls.MAGIC, cls.VERSION, 0, num_slots, arena_size)
+        return cls(shm, multiprocessing.Lock())
+
+    @staticmethod
+    def _buffer(shm: shared_memory.SharedMemory) -> memoryview:
+        if shm.buf is None:
+            raise ValueError(f"{shm.name} has been closed")
+        return shm.buf
+
+    def close(self):
+        """Close this process's view of the cache."""
+        # Our view of the buffer has to be released before the shared memory can be closed
+        if hasattr(self, 'buf'):
+            del self.buf
+        self.shm.close()
+
+    def unlink(self):
+        """Free the shared memory block. Only the process that created the cache should call this."""
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def arena_used(self) -> int:
+        """Number of bytes of the arena used by keys and values."""
+        return self.STATE.unpack_from(self.buf, self.HEADER.size)[0]
+
+    def __len__(self) -> int:
+        return self.STATE.unpack_from(self.buf, self.HEADER.size)[1]
+
+    @staticmethod
+    def _hash(key: bytes) -> int:
+        # Must be stable across processes, so not hash(). 0 marks an empty slot.
+        return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") or 1
+
+    def _probe(self, h: int):
+        start = h % self.num_slots
+        for i in range(self.num_slots):
+            offset = self._slots_offset + ((start + i) % self.num_slots) * self.SLOT.size
+            yield offset, self.SLOT.unpack_from(self.buf, offset)
+
+    def _find(self, key: bytes, h: int) -> "tuple[int, Optional[bytes]]":
+        """Return the slot offset for key, and the stored value if it is present."""
+        for offset, (slot_hash, data_offset, key_len, value_len) in self._probe(h):
+            if slot_hash == 0:
+                return offset, None
+            if slot_hash == h and key_len == len(key):
+                start = self._arena_offset + data_offset
+                if self.buf[start : start + key_len] == key:
+                    return offset, bytes(self.buf[start + key_len : start + key_len + value_len])
+        return -1, None
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None if it isn't cached."""
+        encoded = key.encode("utf-8")
+        _, value = self._find(encoded, self._hash(encoded))
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value.decode("utf-8")
+
+    def set(self, key: str, value: str) -> None:
+        """Store a value, unless the key is already present or the cache is full."""
+        encoded_key = key.encode("utf-8")
+        encoded_value = value.encode("utf-8")
+        size = len(encoded_key) + len(encoded_value)
+        if len(encoded_key) > 0xFFFF or len(encoded_value) > 0xFFFF:
+            return
+        h = self._hash(encoded_key)
+
+        with self.lock:
+            slot_offset, existing = self._find(encoded_key, h)
+            if existing is not None or slot_offset < 0:
+                return
+            used, entries = self.STATE.unpack_from(self.buf, self.HEADER.size)
+            if used + size > self.arena_size or entries + 1 > self.num_slots * self.MAX_LOAD:
+                return
+            start = self._arena_offset + used
+            self.buf[start : start + size] = encoded_key + encoded_value
+            self.STATE.pack_into(self.buf, self.HEADER.size, used + size, entries + 1)
+            # Publish: fill in the location first, then the hash that makes the slot visible
+            struct.pack_into("<IHH", self.buf, slot_offset + 8, used, len(encoded_key), len(encoded_value))
+            struct.pack_into("<Q", self.buf, slot_offset, h)
@@ -0,0 +1,233 @@
+"""
+Where a :py:class:`~freedesktop_icons.theme.Theme` reads its files from.
+
+By default themes are read from loose files in the :py:func:`~freedesktop_icons.theme_search_dirs`
+(:py:class:`FileStorage`), but a theme can also be read from a single zip archive (:py:class:`ZipStorage`), which
+avoids shipping -- and ``stat(2)``-ing -- tens of thousands of small files. Other formats can be supported by any
+object with the methods described by :py:class:`Storage`.
+
+Paths passed to a storage are strings (or path objects) within it; directories may be given with a trailing
+separator.
+"""
+
+import io
+import os
+import threading
+import zipfile
+from collections.abc import Iterator
+from pathlib import Path, PurePath, PurePosixPath
+from typing import IO, Any, Optional, Protocol, Union
+
+import attr
+
+from . import theme_search_dirs
+from .cache import GtkIconCache
+
+StrPath = Union[str, PurePath]
+
+
+class Storage(Protocol):
+    """
+    The methods a storage backend for a :py:class:`~freedesktop_icons.theme.Theme` needs.
+
+    :py:class:`FileStorage` and :py:class:`ZipStorage` both implement this.
+    """
+
+    sep: str
+    """Separator between the parts of paths within the storage"""
+
+    def theme_dirs(self, name: str) -> Iterator[PurePath]:
+        """Return the directories the theme called ``name`` could be in, in search order."""
+
+    def mtime(self, path: StrPath) -> Optional[int]:
+        """Return the modification time of ``path`` in ns, or None if it doesn't exist."""
+
+    def open_text(self, path: StrPath) -> IO[str]:
+        """Open a file for reading, raising :py:class:`FileNotFoundError` if it doesn't exist."""
+
+    def subdirs(self, path: StrPath) -> frozenset[str]:
+        """Return the names of the directories directly inside ``path``."""
+
+    def listdir(self, path: StrPath) -> Iterator[str]:
+        """Return the names of everything directly inside ``path``."""
+
+    def exists(self, path: str) -> bool:
+        """Return whether the file ``path`` exists."""
+
+    def open_cache(self, dir: StrPath) -> Optional[GtkIconCache]:
+        """Return the ``icon-theme.cache`` in ``dir``, or None if there isn't one."""
+
+    def path(self, file: str) -> Any:
+        """Return the object to hand back from a lookup for ``file``, such as a :py:class:`pathlib.Path`."""
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class FileStorage:
+    """
+    Read themes from loose files on disk, found in :py:func:`~freedesktop_icons.theme_search_dirs` or the given
+    ``search_dirs``.
+    """
+
+    search_dirs: Optional[tuple[Path, ...]] = None
+    """Directories to search for themes, instead of :py:func:`~freedesktop_icons.theme_search_dirs`"""
+    sep = os.sep
+
+    def theme_dirs(self, name: str) -> Iterator[Path]:
+        """Return the directories the theme called ``name`` could be in, in search order."""
+        for dir in theme_search_dirs() if self.search_dirs is None else self.search_dirs:
+            yield dir / name
+
+    def mtime(self, path: StrPath) -> Optional[int]:
+        """Return the modification time of ``path`` in ns, or None if it doesn't exist."""
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def open_text(self, path: StrPath) -> IO[str]:
+        """Open a file for reading, raising :py:class:`FileNotFoundError` if it doesn't exist."""
+        return open(path)
+
+    def subdirs(self, path: StrPath) -> frozenset[str]:
+        """Return the names of the directories directly inside ``path``."""
+        try:
+            with os.scandir(path) as it:
+                return frozenset(entry.name for entry in it if entry.is_dir())
+        except OSError:
+            return frozenset()
+
+    def listdir(self, path: StrPath) -> Iterator[str]:
+        """Return the names of everything directly inside ``path``."""
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    yield entry.name
+        except OSError:
+            pass
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(path)
+
+    def open_cache(self, dir: StrPath) -> Optional[GtkIconCache]:
+        """Return the ``icon-theme.cache`` in ``dir``, or None if there isn't one."""
+        try:
+            return GtkIconCache(dir)
+        except FileNotFoundError:
+            return None
+
+    def path(self, file: str) -> Path:
+        """Return the object to hand back from a lookup for ``file``."""
+        return Path(file)
+
+
+@attr.s(auto_attribs=True, hash=False, eq=False)
+class ZipStorage:
+    """
+    Read themes from a zip archive.
+
+    Each theme is a top-level directory in the archive named after the theme, laid out just as it would be on disk
+    (``Adwaita/index.theme``, ``Adwaita/16x16/apps/...`` and optionally ``Adwaita/icon-theme.cache``). The archive's
+    central directory is read once into an in-memory index, so checking which directories and files exist never
+    touches the filesystem, and it is only re-read if the archive's mtime changes.
+
+    Lookups in a theme stored like this return :py:class:`zipfile.Path` objects, which can be opened or read like a
+    :py:class:`pathlib.Path`.
+
+    Normally used through :py:func:`~freedesktop_icons.add_theme_archive`.
+
+    Args:
+        archive (pathlib.Path): Path of the zip file
+    """
+
+    archive: Path = attr.ib(converter=Path)
+    sep = '/'
+
+    _zip: zipfile.ZipFile = attr.ib(init=False, repr=False)
+    _dirs: dict[str, dict[str, bool]] = attr.ib(init=False, repr=False)
+    """Each directory (with a trailing ``/``, the root being ``""``) mapped to its entries, and whether each is a directory"""
+    _mtime: Optional[int] = attr.ib(init=False, repr=False, default=None)
+    _lock: threading.Lock = attr.ib(init=False, repr=False, factory=threading.Lock)
+
+    def __attrs_post_init__(self):
+        self._load()
+
+    def _load(self):
+        mtime = os.stat(self.archive).st_mtime_ns
+        zf = zipfile.ZipFile(self.archive)
+
+        dirs: dict[str, dict[str, bool]] = {'': {}}
+        for info in zf.infolist():
+            parts = info.filename.strip('/').split('/')
+            parent = ''
+            for i, part in enumerate(parts):
+                is_dir = i < len(parts) - 1 or info.is_dir()
+                entries = dirs.setdefault(parent, {})
+                entries[part] = entries.get(part, False) or is_dir
+                if is_dir:
+                    parent = f'{parent}{part}/'
+                    dirs.setdefault(parent, {})
+        self._zip, self._dirs, self._mtime = zf, dirs, mtime
+
+    def refresh(self):
+        """
+        Re-read the archive if it has been replaced since it was last read.
+
+        The previously opened archive isn't closed, as :py:class:`zipfile.Path` objects returned by earlier lookups
+        still read from it: it is closed once none of them are left. As long as the archive is replaced (for example
+        by renaming a new file over it) rather than rewritten in place, those paths keep reading the old contents.
+        """
+        with self._lock:
+            if os.stat(self.archive).st_mtime_ns != self._mtime:
+                self._load()
+
+    @staticmethod
+    def _member(path: StrPath) -> str:
+        return os.fspath(path).replace(os.sep, '/').strip('/')
+
+    def _dir(self, path: StrPath) -> Optional[dict[str, bool]]:
+        member = self._member(path)
+        return self._dirs.get(f'{member}/' if member else '')
+
+    def themes(self) -> list[str]:
+        """Return the names of the themes in the archive, i.e. the top-level directories with an ``index.theme``."""
+        return [name for name, is_dir in self._dirs[''].items() if is_dir and self.exists(f'{name}/index.theme')]
+
+    def theme_dirs(self, name: str) -> Iterator[PurePosixPath]:
+        yield PurePosixPath(name)
+
+    def mtime(self, path: StrPath) -> Optional[int]:
+        try:
+            self.refresh()
+        except OSError:
+            return None
+        if self._dir(path) is None and not self.exists(self._member(path)):
+            return None
+        return self._mtime
+
+    def open_text(self, path: StrPath) -> IO[str]:
+        try:
+            return io.TextIOWrapper(self._zip.open(self._member(path)))
+        except KeyError:
+            raise FileNotFoundError(f'{self.archive}/{self._member(path)}') from None
+
+    def subdirs(self, path: StrPath) -> frozenset[str]:
+        return frozenset(name for name, is_dir in (self._dir(path) or {}).items() if is_dir)
+
+    def listdir(self, path: StrPath) -> Iterator[str]:
+        yield from self._dir(path) or ()
+
+    def exists(self, path: str) -> bool:
+        dir, _, name = path.rpartition('/')
+        entries = self._dirs.get(f'{dir}/' if dir else '')
+        return entries is not None and name in entries
+
+    def open_cache(self, dir: StrPath) -> Optional[GtkIconCache]:
+        member = f'{self._member(dir)}/icon-theme.cache'
+        try:
+            data = self._zip.read(member)
+        except KeyError:
+            return None
+        return GtkIconCache.from_bytes(data, PurePosixPath(self._member(dir)))
+
+    def path(self, file: str) -> zipfile.Path:
+        return zipfile.Path(self._zip, at=file)
@@ -1,16 +1,22 @@
 import configparser
 import sys
-from collections.abc import Iterator, Mapping, Sequence
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
 from functools import cache
-from pathlib import Path
-from typing import Optional
+from pathlib import Path, PurePath
+from typing import TYPE_CHECKING, Optional
 
 import attr
 from attr.converters import pipe
 
-from . import icons, theme_search_dirs
+from . import icons
+from .budget import Budget, is_slow, record_probe
 from .cache import GtkIconCache
 from .slots import slotted_cached_property
+from .storage import FileStorage, Storage
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .context import SearchContext
 
 
 @attr.define(hash=True)
@@ -19,12 +25,15 @@ class Theme:
     Information about a given FreeDesktop icon theme.
 
     If just given a name (the only required argument) argument then the ``index.theme`` file will be searched for in
-    :py:func:`~freedesktop_icons.theme_search_dirs`
+    :py:func:`~freedesktop_icons.theme_search_dirs`, or it can be read from somewhere else such as a zip archive by
+    passing a ``storage`` (see :py:mod:`freedesktop_icons.storage`).
     """
 
     name: str
     theme_dir: Path = attr.ib(converter=attr.converters.optional(Path), default=None)
     """Override the search paths and only look in this specific folder"""
+    storage: Storage = attr.ib(factory=FileStorage, repr=False, hash=False, eq=False)
+    """Where to read the theme's files from"""
     config: configparser.ConfigParser = attr.ib(
         default=attr.Factory(lambda self: self._load_config(), takes_self=True),
         repr=False,
@@ -36,6 +45,13 @@ class Theme:
         repr=False,
         hash=False,
     )
+    _base_dirs: Optional[list["BaseDir"]] = attr.ib(default=None, init=False, repr=False, hash=False, eq=False)
+    _stamp: Optional[tuple[Optional[int], ...]] = attr.ib(default=None, init=False, repr=False, hash=False, eq=False)
+    _checked_at: float = attr.ib(default=0.0, init=False, repr=False, hash=False, eq=False)
+    _icon_names: Optional[frozenset[str]] = attr.ib(default=None, init=False, repr=False, hash=False, eq=False)
+
+    RESCAN_INTERVAL = 5.0
+    """Minimum number of seconds between checks of whether the theme directories have changed"""
 
     @property
     def parents(self) -> Iterator[str]:
@@ -54,7 +70,7 @@ class Theme:
         # > found while searching the base directories in order is used
         for dir in self._possible_theme_dirs():
             try:
-                with (dir / 'index.theme').open() as fh:
+                with self.storage.open_text(dir / 'index.theme') as fh:
                     config.read_file(fh)
 
                     return config
@@ -69,98 +85,441 @@ class Theme:
         if not self.config:
             return
         # filter(None,) because some themes have a trailing , which we want to exclude!
-        yield from map(str.strip, filter(None, self.config['Icon Theme'][name].split(',')))
+        yield from map(str.strip, filter(None, self.config['Icon Theme'].get(name, '').split(',')))
 
-    def _possible_theme_dirs(self) -> Iterator[Path]:
+    def _possible_theme_dirs(self) -> Iterator[PurePath]:
         if self.theme_dir:
             yield self.theme_dir
         else:
-            for dir in theme_search_dirs():
-                yield dir / self.name
+            yield from self.storage.theme_dirs(self.name)
 
-    @slotted_cached_property
-    def icon_cache(self) -> Optional[GtkIconCache]:
-        # index.cache could be in _any_ of the possible theme dirs!
+    def _dir_stamp(self) -> tuple[Optional[int], ...]:
+        # Every base directory is checked, even slow ones: which directories contain the theme mustn't depend on how
+        # slow they were, as lookups without a budget use all of them.
+        stamp: list[Optional[int]] = []
+        for dir in self._possible_theme_dirs():
+            root = str(dir.parent)
+            start = time.monotonic()
+            stamp.append(self.storage.mtime(dir))
+            record_probe(root, time.monotonic() - start)
+        return tuple(stamp)
+
+    @property
+    def generation(self) -> tuple[int, ...]:
+        """
+        A stamp that changes when the theme is changed on disk.
 
+        This is the mtime of each of the possible base directories for the theme, and of the ``icon-theme.cache`` in
+        each (0 where they don't exist). Adding or removing sub-directories, or updating the icon cache with
+        ``gtk-update-icon-cache`` as is normally done when installing icons, changes it.
+        """
+        stamp = []
         for dir in self._possible_theme_dirs():
-            try:
-                return GtkIconCache(dir)
-            except FileNotFoundError:
-                pass
-        return None
+            for path in (dir, dir / 'icon-theme.cache'):
+                stamp.append(self.storage.mtime(path) or 0)
+        return tuple(stamp)
+
+    def invalidate(self):
+        """
+        Forget which base directories and sub-directories of this theme exist, so they are re-scanned on next use.
+
+        This happens automatically (checked at most every :py:attr:`RESCAN_INTERVAL` seconds) when the mtime of any of
+        the theme's base directories changes.
+        """
+        self._base_dirs = None
+        self._stamp = None
+        self._icon_names = None
+
+    @property
+    def base_dirs(self) -> list["BaseDir"]:
+        """
+        The base directories that actually contain this theme, in search order, along with which of the theme's
+        sub-directories exist in each.
+        """
+        now = time.monotonic()
+        if self._base_dirs is not None and now - self._checked_at < self.RESCAN_INTERVAL:
+            return self._base_dirs
+
+        self._checked_at = now
+        stamp = self._dir_stamp()
+        if self._base_dirs is None or stamp != self._stamp:
+            self._base_dirs = self._scan_base_dirs(stamp)
+            self._stamp = stamp
+            self._icon_names = None
+        return self._base_dirs
+
+    @property
+    def icon_names(self) -> frozenset[str]:
+        """
+        The names of every icon in this theme (but not its parents).
+
+        This is read from the icon cache in each base directory, or by listing the theme's directories in base
+        directories without a cache, and is rebuilt whenever :py:attr:`base_dirs` is.
+        """
+        bases = self.base_dirs
+        if self._icon_names is None:
+            self._icon_names = frozenset(self._read_icon_names(bases))
+        return self._icon_names
+
+    def _read_icon_names(self, bases: Sequence["BaseDir"]) -> Iterator[str]:
+        for base in bases:
+            if base.cache is not None:
+                yield from base.cache.names()
+            else:
+                yield from self._scan_icon_names(base)
+
+    def iter_icon_names(self, prefix: str = "") -> Iterator[str]:
+        """
+        Return the names of the icons in this theme (but not its parents), optionally only those starting with
+        ``prefix``.
+
+        Unlike :py:attr:`icon_names` this reads names lazily, so the first results are returned straight away even for
+        large themes.
+        """
+        if self._icon_names is not None:
+            names: Iterable[str] = self._icon_names
+        else:
+            names = self._read_icon_names(self.base_dirs)
+
+        seen: set[str] = set()
+        for name in names:
+            if name.startswith(prefix) and name not in seen:
+                seen.add(name)
+                yield name
+
+    def search(self, prefix: str) -> Iterator[str]:
+        """Return the names of the icons in this theme that start with ``prefix``."""
+        return self.iter_icon_names(prefix)
+
+    def _default_icon_files(self, exts: Sequence[str]) -> Iterator[tuple[str, str, int]]:
+        """
+        For every icon in the theme, yield ``(name, directory prefix, index into exts)`` of the file that
+        ``lookup(Icon(name), exts)`` would return.
+
+        Each directory is listed once instead of probing each file, which makes this suitable for building an index
+        of the whole theme.
 
-    def lookup(self, icon: icons.Icon, exts: Sequence[str]) -> "Path | None":
+        :meta private:
+        """
+        bases = self.base_dirs
+        default = icons.Icon('')
+        ext_idx = {ext: i for i, ext in reversed(list(enumerate(exts)))}
+        ext_flags = [GtkIconCache.SUFFIX_FLAGS.get(ext) for ext in exts]
+        listings: dict[str, dict[str, int]] = {}
+
+        def listing(prefix: str) -> dict[str, int]:
+            # name -> index of the most preferred extension present in this directory
+            if prefix not in listings:
+                found: dict[str, int] = {}
+                for filename in self.storage.listdir(prefix):
+                    name, dot, ext = filename.rpartition('.')
+                    if dot and (i := ext_idx.get(ext)) is not None and i < found.get(name, sys.maxsize):
+                        found[name] = i
+                listings[prefix] = found
+            return listings[prefix]
+
+        def cache_listings(cache: GtkIconCache) -> dict[str, dict[str, int]]:
+            # sub-directory -> name -> index of the most preferred extension, from the cache flags
+            by_dir: dict[str, dict[str, int]] = {}
+            for name, images in cache._all():
+                for dirname, flags in images:
+                    for i, flag in enumerate(ext_flags):
+                        if flag is not None and flags & flag:
+                            by_dir.setdefault(dirname, {})[name] = i
+                            break
+            return by_dir
+
+        # The cache only knows about the extensions it has flags for, so anything else means listing the directories
+        use_caches = None not in ext_flags
+        cached = [cache_listings(base.cache) if use_caches and base.cache is not None else None for base in bases]
+
+        seen: set[str] = set()
+        for dirname in self._all_icon_dirs():
+            if not self.subdirs[dirname].matches_icon(default):
+                continue
+            for base, by_dir in zip(bases, cached):
+                if (prefix := base.subdirs.get(dirname)) is None:
+                    continue
+                found = listing(prefix) if by_dir is None else by_dir.get(dirname, {})
+                for name, i in found.items():
+                    if name not in seen:
+                        seen.add(name)
+                        yield name, prefix, i
+
+    def _scan_icon_names(self, base: "BaseDir") -> Iterator[str]:
+        for prefix in base.subdirs.values():
+            for filename in self.storage.listdir(prefix):
+                name, dot, _ = filename.rpartition('.')
+                if dot and name:
+                    yield name
+
+    def _scan_base_dirs(self, stamp: tuple[Optional[int], ...]) -> list["BaseDir"]:
+        wanted = list(self._all_icon_dirs())
+        sep = self.storage.sep
+        result = []
+        for dir, mtime in zip(self._possible_theme_dirs(), stamp):
+            if mtime is None:
+                continue
+
+            # Pre-join the prefixes so lookups only need to append the file name
+            prefix = f'{dir}{sep}'
+            listings: dict[str, frozenset[str]] = {}
+
+            def listdir(path: str) -> frozenset[str]:
+                # Memoize so each parent directory (e.g. ``16x16``) is only read once
+                if path not in listings:
+                    listings[path] = self.storage.subdirs(f'{prefix}{path}')
+                return listings[path]
+
+            present = {subdir: f'{prefix}{subdir}{sep}' for subdir in wanted if self._subdir_exists(subdir, listdir)}
+            if present:
+                result.append(BaseDir(path=dir, subdirs=present, cache=self._open_cache(dir, mtime)))
+        return result
+
+    def _open_cache(self, dir: PurePath, mtime: int) -> Optional[GtkIconCache]:
+        # As GTK does, a cache older than its directory is out of date (icons have been added or removed since it was
+        # written) and is ignored, so the directory is searched as if it didn't have one. This is compared in whole
+        # seconds, as GTK does: the cache is normally written to a temporary file and renamed into place, which
+        # updates the directory's mtime just after the cache's.
+        cache_mtime = self.storage.mtime(dir / 'icon-theme.cache')
+        if cache_mtime is None or cache_mtime // 1_000_000_000 < mtime // 1_000_000_000:
+            return None
+        return self.storage.open_cache(dir)
+
+    @staticmethod
+    def _subdir_exists(subdir: str, listdir) -> bool:
+        parent = ''
+        for part in subdir.split('/'):
+            if part not in listdir(parent):
+                return False
+            parent = f'{parent}/{part}' if parent else part
+        return True
+
+    @property
+    def icon_cache(self) -> Optional[GtkIconCache]:
+        """
+        The icon cache from the first base directory that has one.
+
+        A theme split across several base directories can have a cache in each of them (or only some): lookups use all
+        of them, see :py:attr:`BaseDir.cache <freedesktop_icons.theme.BaseDir.cache>`.
+        """
+        return next((base.cache for base in self.base_dirs if base.cache is not None), None)
+
+    @slotted_cached_property
+    def _dir_order(self) -> dict[str, int]:
+        return {dirname: i for i, dirname in enumerate(self._all_icon_dirs())}
+
+    def _icon_dirs(self, name: str) -> tuple[list["BaseDir"], Iterable[str], list[Optional[dict[str, int]]]]:
+        """
+        Find where an icon called ``name`` could be.
+
+        Returns the base directories, the sub-directories to search in theme order, and for each base directory the
+        sub-directories and flags from its icon cache (or None if it doesn't have one).
+        """
+        bases = self.base_dirs
+        hits = [None if base.cache is None else dict(base.cache.lookup_flags(name)) for base in bases]
+
+        if any(hit is None for hit in hits):
+            # At least one base directory has to be searched without a cache, so any sub-directory could have it
+            return bases, self._all_icon_dirs(), hits
+
+        order = self._dir_order
+        dirs = {dirname for hit in hits for dirname in hit if dirname in order}  # type: ignore
+        return bases, sorted(dirs, key=order.__getitem__), hits
+
+    def lookup(self, icon: icons.Icon, exts: Sequence[str], budget: Optional[Budget] = None) -> "Path | None":
         """
         Lookup the best matching icon in this theme.
 
-        If there is an exact match, use that, else find the closest sized image
+        If there is an exact match, use that, else find the closest sized image.
+
+        If ``icon.generic_fallback`` is set then the generic names for the icon (see
+        :py:meth:`~freedesktop_icons.icons.Icon.fallback_names`) are tried in turn, most specific first. Only the names
+        in :py:attr:`icon_names` are actually looked up, so names the theme doesn't have cost nothing.
+
+        If the icon has symbolic or text direction variants (see
+        :py:meth:`~freedesktop_icons.icons.Icon.variant_names`) they are all searched for together, see
+        :py:meth:`lookup_variants`.
 
         Args:
             exts: List of file extensions to search for
+            budget: Limit on the files checked, see :py:class:`~freedesktop_icons.budget.Budget`
         """
-        if file := self.lookup_exact(icon, exts):
+        if icon.generic_fallback:
+            names = self.icon_names
+            for name in icon.fallback_names():
+                specific = attr.evolve(icon, name=name, generic_fallback=False)
+                if any(variant in names for variant in specific.variant_names()) and (file := self.lookup(specific, exts, budget)):
+                    return file
+            return None
+
+        if icon.symbolic or icon.direction:
+            return self.lookup_variants(icon, exts, budget)
+
+        if file := self.lookup_exact(icon, exts, budget):
             return file
-        if file := self.lookup_closest(icon, exts):
+        if file := self.lookup_closest(icon, exts, budget):
             return file
         return None
 
-    def lookup_exact(self, icon: icons.Icon, exts: Sequence[str]) -> "Path | None":
+    def lookup_variants(self, icon: icons.Icon, exts: Sequence[str], budget: Optional[Budget] = None) -> "Path | None":
+        """
+        Lookup the best of the variants of an icon.
+
+        The variant names are in order of preference, and a variant that exists at any size is preferred over every
+        variant after it, so this returns the exact match or closest sized image of the first variant that exists.
+        All of the variants are searched for in one pass over the theme's directories, and names that aren't in an
+        icon cache are skipped without checking any files. If ``png`` is one of the extensions, symbolic variants
+        can also be pre-rendered ``.symbolic.png`` files, which the icon cache has a flag for.
+
+        Args:
+            exts: List of file extensions to search for
+            budget: Limit on the files checked
+        Returns:
+            Path object of best matching icon
+        """
+        bases = self.base_dirs
+        uncached = any(base.cache is None for base in bases)
+        symbolic_exts = list(exts)
+        if 'png' in exts and 'symbolic.png' not in exts:
+            # A pre-rendered symbolic icon is a PNG, so is only wanted if PNGs are
+            symbolic_exts.append('symbolic.png')
+
+        # (name, extensions, hits) for each variant that could be in this theme, in order of preference
+        variants: list[tuple[str, Sequence[str], list[Optional[dict[str, int]]]]] = []
+        cached_dirs: set[str] = set()
+        for name in icon.variant_names():
+            hits = [None if base.cache is None else dict(base.cache.lookup_flags(name)) for base in bases]
+            if not uncached:
+                if not any(hits):
+                    continue
+                cached_dirs.update(dirname for hit in hits for dirname in hit)  # type: ignore
+            variants.append((name, symbolic_exts if icon.symbolic and '-symbolic' in name else exts, hits))
+
+        if uncached:
+            dirs: Iterable[str] = self._all_icon_dirs()
+        else:
+            order = self._dir_order
+            dirs = sorted((dirname for dirname in cached_dirs if dirname in order), key=order.__getitem__)
+
+        # The index of the most preferred variant with an exact match so far: only variants before it are searched
+        # for from then on
+        exact, exact_file = len(variants), None
+        closest: list[tuple[int, Optional[str]]] = [(sys.maxsize, None)] * len(variants)
+        for dirname in dirs:
+            subdir = self.subdirs[dirname]
+            matches = subdir.matches_icon(icon)
+            diff = subdir.size_diff(icon)
+            for i in range(exact):
+                name, name_exts, hits = variants[i]
+                if not matches and (diff is None or diff >= closest[i][0]):
+                    continue
+                if file := self._find_file(bases, hits, dirname, name, name_exts, self.storage.exists, budget):
+                    if matches:
+                        exact, exact_file = i, file
+                        break
+                    closest[i] = (diff, file)  # type: ignore
+            if exact == 0:
+                break
+
+        for i, (_, file) in enumerate(closest):
+            if i == exact:
+                return self.storage.path(exact_file)  # type: ignore
+            if file is not None:
+                return self.storage.path(file)
+        return None
+
+    def lookup_exact(self, icon: icons.Icon, exts: Sequence[str], budget: Optional[Budget] = None) -> "Path | None":
         """
         Lookup an icon that matches exactly
 
         Args:
             exts: List of file extensions to search for
+            budget: Limit on the files checked
         Returns:
             Path object of matching icon
         """
-        if self.icon_cache is not None:
-            dirs: Iterator[str] = self.icon_cache.lookup(icon.name)
-        else:
-            dirs = self._all_icon_dirs()
+        bases, dirs, hits = self._icon_dirs(icon.name)
 
         for dirname in dirs:
             dir = self.subdirs[dirname]
             if not dir.matches_icon(icon):
                 continue
 
-            for search_dir in self._possible_theme_dirs():
-                search_dir /= dirname
-                for ext in exts:
-                    file = search_dir / f'{icon.name}.{ext}'
-                    if file.exists():
-                        return file
+            if file := self._find_file(bases, hits, dirname, icon.name, exts, self.storage.exists, budget):
+                return self.storage.path(file)
         return None
 
-    def lookup_closest(self, icon: icons.Icon, exts) -> "Path | None":
+    def lookup_closest(self, icon: icons.Icon, exts, budget: Optional[Budget] = None) -> "Path | None":
         """
         Find the icon that closest matches the requested size.
 
         Args:
             exts: List of file extensions to search for
+            budget: Limit on the files checked. If it runs out the closest icon found so far is returned
         Returns:
             Path object of closest matching icon
         """
         closest = None
         minimal_size = sys.maxsize
 
-        if self.icon_cache is not None:
-            dirs = self.icon_cache.lookup(icon.name)
-        else:
-            dirs = self._all_icon_dirs()
+        bases, dirs, hits = self._icon_dirs(icon.name)
 
         for dirname in dirs:
-            theme_dir = self.subdirs[dirname]
-
-            for search_dir in self._possible_theme_dirs():
-                search_dir /= dirname
-                for ext in exts:
-                    file = search_dir / f'{icon.name}.{ext}'
-                    if (diff := theme_dir.size_diff(icon)) is not None and diff < minimal_size and file.exists():
-                        closest = file
-                        minimal_size = diff
-        return closest
-
-    @attr.define(repr=False, hash=True)
+            diff = self.subdirs[dirname].size_diff(icon)
+            if diff is None or diff >= minimal_size:
+                continue
+
+            if file := self._find_file(bases, hits, dirname, icon.name, exts, self.storage.exists, budget):
+                closest = file
+                minimal_size = diff
+        return self.storage.path(closest) if closest else None
+
+    @staticmethod
+    def _find_file(
+        bases: Sequence["BaseDir"],
+        hits: Sequence[Optional[Mapping[str, int]]],
+        dirname: str,
+        name: str,
+        exts: Sequence[str],
+        exists: Callable[[str], bool],
+        budget: Optional[Budget] = None,
+    ) -> Optional[str]:
+        # This is the inner loop of every lookup, so it works on plain strings and only the caller builds a Path for
+        # the file that is actually returned. Where a base directory has an icon cache its flags say which files
+        # exist, so only base directories without one need a stat(2) per candidate, and only those count against the
+        # budget, are timed to find slow base directories, or are skipped when slow.
+        for base, hit in zip(bases, hits):
+            prefix = base.subdirs.get(dirname)
+            if prefix is None:
+                continue
+            flags = None if hit is None else hit.get(dirname)
+            if hit is not None and flags is None:
+                continue
+            if hit is None and budget is not None and is_slow(base.root):
+                # Only lookups with a budget skip slow base directories, and the result might not be the best one
+                budget.incomplete = True
+                continue
+            for ext in exts:
+                file = f'{prefix}{name}.{ext}'
+                if flags is not None and (flag := GtkIconCache.SUFFIX_FLAGS.get(ext)) is not None:
+                    if flags & flag:
+                        return file
+                    continue
+                if budget is not None and not budget.spend():
+                    # Stop probing here, but carry on with the other base directories, as any with an icon cache can
+                    # still answer without a probe
+                    if hit is None:
+                        break
+                    continue
+                start = time.monotonic()
+                found = exists(file)
+                record_probe(base.root, time.monotonic() - start)
+                if found:
+                    return file
+        return None
+
+    @attr.define(repr=False, eq=False)
     class ThemeDirs:
         """
         Helper that creates ThemeDirectory objects on first access
@@ -188,6 +547,107 @@ class Theme:
             )
 
 
+@attr.define
+class ThemeInfo:
+    """
+    A summary of an installed theme, as returned by :py:func:`~freedesktop_icons.list_themes`.
+
+    Only the ``[Icon Theme]`` section of the ``index.theme`` is read to create this, so it is much cheaper than a
+    :py:class:`Theme`. Use :py:meth:`load` to get the full theme.
+    """
+
+    name: str
+    """Name of the theme, as passed to :py:func:`~freedesktop_icons.lookup`"""
+    path: PurePath
+    """Directory of the ``index.theme`` that was read"""
+    display_name: Optional[str] = None
+    """The ``Name`` key: the name to show to users"""
+    comment: Optional[str] = None
+    inherits: list[str] = attr.Factory(list)
+    """Themes this one inherits from, as listed in the file"""
+    num_directories: int = 0
+    """Number of sub-directories listed in ``Directories``"""
+    hidden: bool = False
+    """Whether the theme should be hidden from theme selection UIs"""
+    storage: Storage = attr.ib(factory=FileStorage, repr=False, eq=False)
+    context: Optional["SearchContext"] = attr.ib(default=None, repr=False, eq=False)
+    """The context the theme was found in, if any"""
+
+    @classmethod
+    def read(cls, name: str, path: PurePath, storage: Storage, context: Optional["SearchContext"] = None) -> Optional["ThemeInfo"]:
+        """
+        Read the header of ``path/index.theme``, returning None if it doesn't exist or isn't an icon theme.
+
+        :meta private:
+        """
+        lines = []
+        found = False
+        try:
+            with storage.open_text(path / 'index.theme') as fh:
+                for line in fh:
+                    if line.startswith('['):
+                        if found:
+                            break
+                        found = line.strip() == '[Icon Theme]'
+                    elif found:
+                        lines.append(line)
+        except (OSError, UnicodeDecodeError):
+            return None
+        if not found:
+            return None
+
+        config = configparser.ConfigParser(interpolation=None, strict=False)
+        config.optionxform = str  # type: ignore
+        try:
+            config.read_string(''.join(['[Icon Theme]\n', *lines]))
+        except configparser.Error:
+            return None
+        header = config['Icon Theme']
+
+        def split(value: str) -> list[str]:
+            return [item.strip() for item in value.split(',') if item.strip()]
+
+        return cls(
+            name=name,
+            path=path,
+            display_name=header.get('Name'),
+            comment=header.get('Comment'),
+            inherits=split(header.get('Inherits', '')),
+            num_directories=len(split(header.get('Directories', ''))),
+            hidden=header.get('Hidden', '').lower() == 'true',
+            storage=storage,
+            context=context,
+        )
+
+    def load(self) -> Theme:
+        """Return the full :py:class:`Theme` (shared with :py:func:`~freedesktop_icons.lookup`)."""
+        from . import get_theme
+
+        return get_theme(self.name) if self.context is None else self.context.get_theme(self.name)
+
+
+@attr.define
+class BaseDir:
+    """
+    A base directory that contains (part of) a theme
+
+    :meta private:
+    """
+
+    path: PurePath
+    subdirs: Mapping[str, str]
+    """Names of the theme's sub-directories that exist under this base directory, mapped to their full path (as a
+    string, with a trailing separator)"""
+    cache: Optional[GtkIconCache] = None
+    """The ``icon-theme.cache`` in this base directory, if there is one and it is at least as new as the directory"""
+    root: str = attr.ib(init=False, repr=False)
+    """The directory this is in (such as ``~/.icons``), which is what is tracked as being slow"""
+
+    @root.default
+    def _root(self) -> str:
+        return str(self.path.parent)
+
+
 @attr.define
 class ThemeDirectory:
     """
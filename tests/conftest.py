@@ -0,0 +1,31 @@
+import pytest
+
+from freedesktop_icons import get_theme, set_fallback_paths
+from tests.utils import TEST_THEME_DIR, THEME_NAME
+
+
+@pytest.fixture
+def xdg_data_dir(tmp_path, monkeypatch):
+    """
+    Only search ``tmp_path/share`` (and a home directory in ``tmp_path/home``) for themes, with no fallback
+    directories, starting with no themes loaded.
+
+    Returns the ``share`` directory, which isn't created.
+    """
+    monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+    monkeypatch.delenv('XDG_DATA_HOME', raising=False)
+    monkeypatch.setenv('XDG_DATA_DIRS', str(tmp_path / 'share'))
+    set_fallback_paths([])
+    get_theme.cache_clear()
+    yield tmp_path / 'share'
+    set_fallback_paths(None)
+    get_theme.cache_clear()
+
+
+@pytest.fixture
+def data_dir(xdg_data_dir):
+    """Install the test theme as ``THEME_NAME`` in :py:func:`xdg_data_dir`, returning the theme's directory."""
+    icons = xdg_data_dir / 'icons'
+    icons.mkdir(parents=True)
+    (icons / THEME_NAME).symlink_to(TEST_THEME_DIR)
+    return icons / THEME_NAME
@@ -0,0 +1,119 @@
+import pytest
+
+from freedesktop_icons import Icon, budget, get_theme, lookup, set_result_cache
+from freedesktop_icons.budget import Budget, clear_slow_dirs, slow_dirs
+from freedesktop_icons.cache import GtkIconCache, write_icon_cache
+
+INDEX = """[Icon Theme]
+Directories=16x16/apps,32x32/apps,48x48/apps
+[16x16/apps]
+Size=16
+Type=Fixed
+[32x32/apps]
+Size=32
+Type=Fixed
+[48x48/apps]
+Size=48
+Type=Fixed
+"""
+
+
+@pytest.fixture
+def share(xdg_data_dir):
+    theme = xdg_data_dir / 'icons' / 'slow'
+    for file in ['48x48/apps/a.png', '16x16/apps/b.png', '48x48/apps/b.png']:
+        (theme / file).parent.mkdir(parents=True, exist_ok=True)
+        (theme / file).touch()
+    (theme / 'index.theme').write_text(INDEX)
+    clear_slow_dirs()
+    yield xdg_data_dir / 'icons'
+    clear_slow_dirs()
+
+
+def test_unlimited(share):
+    limit = Budget(max_probes=100)
+    assert lookup('a', 'slow', budget=limit) == share / 'slow' / '48x48' / 'apps' / 'a.png'
+    assert not limit.incomplete
+    assert limit.probes == 5
+
+
+def test_max_probes(share):
+    limit = Budget(max_probes=2)
+    assert lookup('a', 'slow', budget=limit) is None
+    assert limit.incomplete
+    assert limit.probes == 2
+
+
+def test_timeout(share):
+    limit = Budget(timeout=0)
+    assert lookup('a', 'slow', budget=limit) is None
+    assert limit.incomplete
+
+
+def test_closest_so_far(share):
+    # 16x16 is probed (and found) before the 48x48 directory that is the better match
+    limit = Budget(max_probes=3)
+    assert lookup(Icon('b', size=40), 'slow', budget=limit) == share / 'slow' / '16x16' / 'apps' / 'b.png'
+    assert limit.incomplete
+    assert lookup(Icon('b', size=40), 'slow') == share / 'slow' / '48x48' / 'apps' / 'b.png'
+
+
+def test_incomplete_not_cached(share):
+    results: dict = {}
+
+    class Cache:
+        get = results.get
+
+        def set(self, key, value):
+            results[key] = value
+
+    set_result_cache(Cache())
+    try:
+        lookup('a', 'slow', budget=Budget(max_probes=1))
+        assert results == {}
+        lookup('a', 'slow', budget=Budget())
+        assert list(results.values()) == [str(share / 'slow' / '48x48' / 'apps' / 'a.png')]
+    finally:
+        set_result_cache(None)
+
+
+def test_slow_dirs(share, monkeypatch):
+    assert lookup('a', 'slow') is not None
+    assert slow_dirs() == []
+
+    monkeypatch.setattr(budget, 'SLOW_PROBE_SECONDS', 0)
+    assert lookup('missing', 'slow') is None
+    assert str(share) in slow_dirs()
+
+    # Skipped by lookups with a budget until it is retried, but not by those without
+    limit = Budget()
+    assert lookup('a', 'slow', budget=limit) is None
+    assert limit.incomplete
+    assert lookup('a', 'slow') is not None
+
+    clear_slow_dirs()
+    monkeypatch.setattr(budget, 'SLOW_PROBE_SECONDS', 60)
+    assert lookup('a', 'slow', budget=Budget()) is not None
+
+
+def test_slow_dir_theme_still_loaded(share, monkeypatch):
+    monkeypatch.setattr(budget, 'SLOW_PROBE_SECONDS', 0)
+    budget.record_probe(str(share), 1)
+    assert get_theme('slow').config is not None
+    assert [base.path for base in get_theme('slow').base_dirs] == [share / 'slow']
+
+
+def test_cached_base_used_when_out_of_budget(xdg_data_dir, tmp_path, monkeypatch):
+    # The first base directory has no icon cache, the second does
+    monkeypatch.setenv('XDG_DATA_DIRS', f'{tmp_path / "a"}:{tmp_path / "b"}')
+    for base in ('a', 'b'):
+        (tmp_path / base / 'icons' / 'split' / '16x16' / 'apps').mkdir(parents=True)
+    (tmp_path / 'a' / 'icons' / 'split' / 'index.theme').write_text(INDEX)
+    cached = tmp_path / 'b' / 'icons' / 'split'
+    (cached / '16x16' / 'apps' / 'x.png').touch()
+    write_icon_cache(cached, {'x': [('16x16/apps', GtkIconCache.SUFFIX_FLAGS['png'])]})
+
+    limit = Budget(max_probes=0)
+    assert lookup('x', 'split', budget=limit) == cached / '16x16' / 'apps' / 'x.png'
+    assert limit.incomplete
+    assert limit.probes == 0
@@ -2,7 +2,7 @@ import pathlib
 
 import pytest
 
-from freedesktop_icons.cache import GtkIconCache
+from freedesktop_icons.cache import GtkIconCache, write_icon_cache
 
 
 @pytest.fixture(scope='module')
@@ -18,3 +18,28 @@ def test_lookup(cache):
 
 def test_lookup_not_found(cache):
     assert list(cache.lookup("not-found")) == []
+
+
+def test_names(cache):
+    assert list(cache.names()) == ['button-open']
+    assert list(cache._all()) == [('button-open', [('16x16/actions', GtkIconCache.SUFFIX_FLAGS['svg'])])]
+
+
+def test_lookup_flags(cache):
+    assert list(cache.lookup_flags("button-open")) == [('16x16/actions', GtkIconCache.SUFFIX_FLAGS['svg'])]
+
+
+def test_write_icon_cache(tmp_path):
+    write_icon_cache(tmp_path, {"a": [("16x16/apps", 4), ("scalable/apps", 2)], "b": [("16x16/apps", 1)], "c": []}, num_buckets=2)
+    cache = GtkIconCache(tmp_path)
+
+    assert list(cache.lookup_flags("a")) == [("16x16/apps", 4), ("scalable/apps", 2)]
+    assert list(cache.lookup("b")) == ["16x16/apps"]
+    assert list(cache.lookup("c")) == []
+    assert sorted(cache.names()) == ["a", "b", "c"]
+
+
+def test_from_bytes(cache):
+    path = pathlib.Path(__file__).parent / "data" / "test-theme"
+    from_bytes = GtkIconCache.from_bytes((path / "icon-theme.cache").read_bytes(), path)
+    assert list(from_bytes._all()) == list(cache._all())
@@ -0,0 +1,89 @@
+import io
+import mmap
+import os
+import zipfile
+
+import pytest
+
+from freedesktop_icons import set_fallback_paths
+from freedesktop_icons.content import ContentCache, open_icon, read_icon
+
+
+@pytest.fixture
+def pixmaps(xdg_data_dir, tmp_path):
+    set_fallback_paths([tmp_path])
+    return tmp_path
+
+
+def test_read_icon(pixmaps):
+    (pixmaps / 'small.png').write_bytes(b'small')
+    cache = ContentCache()
+    assert read_icon('small', 'hicolor', cache=cache) == b'small'
+    assert read_icon('small', 'hicolor', cache=cache) == b'small'
+    info = cache.cache_info()
+    assert (info.entries, info.bytes, info.hits, info.misses) == (1, 5, 1, 1)
+    assert read_icon('missing', 'hicolor', cache=cache) is None
+
+
+def test_changed_file_is_reread(pixmaps):
+    file = pixmaps / 'icon.png'
+    file.write_bytes(b'one')
+    cache = ContentCache()
+    assert cache.read(file) == b'one'
+
+    file.write_bytes(b'three')
+    assert cache.read(file) == b'three'
+    assert cache.cache_info().bytes == 5
+
+
+def test_evictions(pixmaps):
+    cache = ContentCache(max_bytes=10)
+    for name in 'abc':
+        (pixmaps / f'{name}.png').write_bytes(b'1234')
+        cache.read(pixmaps / f'{name}.png')
+
+    info = cache.cache_info()
+    assert (info.entries, info.bytes, info.evictions) == (2, 8, 1)
+    # a was least recently used, so was evicted
+    cache.read(pixmaps / 'a.png')
+    assert cache.cache_info().misses == 4
+
+
+def test_too_large_not_cached(pixmaps):
+    (pixmaps / 'big.png').write_bytes(b'x' * 20)
+    cache = ContentCache(max_bytes=10)
+    assert cache.read(pixmaps / 'big.png') == b'x' * 20
+    assert cache.cache_info().entries == 0
+
+
+def test_mmap(pixmaps):
+    (pixmaps / 'large.svg').write_bytes(b'<svg/>' * 100)
+    cache = ContentCache(mmap_threshold=100, max_mapped=1)
+    data = read_icon('large', 'hicolor', cache=cache)
+    assert isinstance(data, memoryview)
+    assert bytes(data) == b'<svg/>' * 100
+    assert cache.cache_info().mapped == 1
+
+    (pixmaps / 'other.svg').write_bytes(b'<svg/>' * 100)
+    cache.read(pixmaps / 'other.svg')
+    info = cache.cache_info()
+    assert (info.mapped, info.evictions) == (1, 1)
+    # Still readable after being evicted
+    assert bytes(data[:6]) == b'<svg/>'
+
+
+@pytest.mark.parametrize('threshold', [100, 1000])
+def test_open_icon(pixmaps, threshold):
+    (pixmaps / 'large.svg').write_bytes(b'<svg/>' * 100)
+    with open_icon('large', 'hicolor', cache=ContentCache(mmap_threshold=threshold)) as fh:
+        assert isinstance(fh, mmap.mmap) == (threshold < os.path.getsize(pixmaps / 'large.svg'))
+        assert fh.read() == b'<svg/>' * 100
+
+
+def test_in_memory_archive_not_cached():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as zf:
+        zf.writestr('icon.svg', '<svg/>')
+    cache = ContentCache()
+    assert cache.read(zipfile.Path(zipfile.ZipFile(buf), at='icon.svg')) == b'<svg/>'
+    assert cache.cache_info().entries == 0
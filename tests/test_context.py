@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import pytest
+
+from freedesktop_icons import get_theme, iter_icon_names, lookup, set_result_cache
+from freedesktop_icons.context import SearchContext, dirs_from_environ
+
+INDEX = """[Icon Theme]
+Directories=16x16/apps
+[16x16/apps]
+Size=16
+"""
+
+
+def test_from_environ():
+    context = SearchContext.from_environ({'HOME': '/home/user', 'XDG_DATA_DIRS': '/opt/share:/usr/share'})
+    assert context.data_dirs == (Path('/home/user/.local/share'), Path('/opt/share'), Path('/usr/share'))
+    assert context.theme_dirs == (Path('/home/user/.icons'), Path('/home/user/.local/share/icons'), Path('/opt/share/icons'), Path('/usr/share/icons'))
+    assert context.fallback_dirs == (Path('/opt/share/pixmaps'), Path('/usr/share/pixmaps'))
+    assert context == SearchContext.from_environ({'HOME': '/home/user', 'XDG_DATA_DIRS': '/opt/share:/usr/share'})
+    assert context.key != SearchContext.from_environ({'HOME': '/home/other', 'XDG_DATA_DIRS': '/opt/share:/usr/share'}).key
+
+
+@pytest.fixture
+def tenants(xdg_data_dir, tmp_path):
+    # The process environment has neither tenant's themes
+
+    contexts = []
+    for tenant in ('alice', 'bob'):
+        theme = tmp_path / tenant / '.local' / 'share' / 'icons' / 'shared'
+        (theme / '16x16' / 'apps').mkdir(parents=True)
+        (theme / 'index.theme').write_text(INDEX)
+        (theme / '16x16' / 'apps' / f'{tenant}.png').touch()
+        (theme / '16x16' / 'apps' / 'common.png').touch()
+        (tmp_path / tenant / 'pixmaps').mkdir()
+        (tmp_path / tenant / 'pixmaps' / f'{tenant}-pixmap.xpm').touch()
+        contexts.append(SearchContext(tmp_path / tenant, [tmp_path / tenant / '.local' / 'share'], [tmp_path / tenant / 'pixmaps']))
+    return contexts
+
+
+def test_lookup(tenants, tmp_path):
+    alice, bob = tenants
+    assert lookup('common', 'shared') is None
+    assert lookup('common', 'shared', context=alice) == tmp_path / 'alice/.local/share/icons/shared/16x16/apps/common.png'
+    assert lookup('common', 'shared', context=bob) == tmp_path / 'bob/.local/share/icons/shared/16x16/apps/common.png'
+    assert lookup('bob', 'shared', context=alice) is None
+    assert lookup('bob-pixmap', 'shared', context=bob) == tmp_path / 'bob/pixmaps/bob-pixmap.xpm'
+    assert lookup('bob-pixmap', 'shared', context=alice) is None
+    assert lookup('common', 'shared', context=alice, flatten=True) == tmp_path / 'alice/.local/share/icons/shared/16x16/apps/common.png'
+    assert lookup('common', 'shared', context=bob, flatten=True) == tmp_path / 'bob/.local/share/icons/shared/16x16/apps/common.png'
+
+
+def test_theme_cache(tenants):
+    alice, bob = tenants
+    assert alice.get_theme('shared') is alice.get_theme('shared')
+    assert alice.get_theme('shared') is not bob.get_theme('shared')
+    assert alice.get_theme('shared') is not get_theme('shared')
+
+
+def test_result_cache_keys(tenants, tmp_path):
+    alice, bob = tenants
+    results: dict = {}
+
+    class Cache:
+        get = results.get
+
+        def set(self, key, value):
+            results[key] = value
+
+    set_result_cache(Cache())
+    try:
+        assert lookup('common', 'shared', context=alice).is_relative_to(tmp_path / 'alice')
+        assert lookup('common', 'shared', context=bob).is_relative_to(tmp_path / 'bob')
+        assert len(results) == 2
+    finally:
+        set_result_cache(None)
+
+
+def test_iter_icon_names(tenants):
+    alice, _ = tenants
+    assert sorted(iter_icon_names('shared', context=alice)) == ['alice', 'alice-pixmap', 'common']
+
+
+def test_storage(tenants, tmp_path):
+    alice, _ = tenants
+    assert list(alice.storage.theme_dirs('shared'))[1] == tmp_path / 'alice/.local/share/icons/shared'
+    assert alice.get_theme('shared').storage is alice.storage
+
+
+def test_dirs_from_environ():
+    environ = {'HOME': '/home/user', 'XDG_DATA_DIRS': '/opt/share:/usr/share'}
+    dirs = dirs_from_environ(environ)
+    assert dirs.theme_dirs == SearchContext.from_environ(environ).theme_dirs
+    # Remembered, so lookups don't re-parse the environment each time
+    assert dirs_from_environ(dict(environ)) is dirs
@@ -0,0 +1,66 @@
+import pytest
+
+from freedesktop_icons import Icon, lookup, set_fallback_paths
+from freedesktop_icons.flat import FlatIndex, get_flat_index
+from tests.utils import TEST_THEME_DIR
+
+INDEX = """[Icon Theme]
+Inherits={inherits}
+Directories=16x16/apps,16x16@2/apps,scalable/apps
+[16x16/apps]
+Size=16
+[16x16@2/apps]
+Size=16
+Scale=2
+[scalable/apps]
+Size=48
+Type=Scalable
+"""
+
+
+def _make_theme(root, name, inherits, files):
+    theme = root / 'icons' / name
+    theme.mkdir(parents=True)
+    (theme / 'index.theme').write_text(INDEX.format(inherits=inherits))
+    for file in files:
+        (theme / file).parent.mkdir(parents=True, exist_ok=True)
+        (theme / file).touch()
+
+
+@pytest.fixture
+def chain(xdg_data_dir):
+    _make_theme(xdg_data_dir, 'flat-child', 'flat-parent', ['16x16/apps/a.png', 'scalable/apps/a.svg', '16x16@2/apps/hidpi.png'])
+    _make_theme(xdg_data_dir, 'flat-parent', 'hicolor', ['16x16/apps/a.svg', 'scalable/apps/b.svg', '16x16/apps/b.png', '16x16/apps/c.xpm'])
+    # hicolor comes from the test theme, which has an icon cache
+    (xdg_data_dir / 'icons' / 'hicolor').symlink_to(TEST_THEME_DIR)
+    (xdg_data_dir / 'pixmaps').mkdir()
+    (xdg_data_dir / 'pixmaps' / 'c.png').touch()
+    (xdg_data_dir / 'pixmaps' / 'd.xpm').touch()
+    set_fallback_paths([xdg_data_dir / 'pixmaps'])
+    return xdg_data_dir
+
+
+def test_matches_lookup(chain):
+    names = ['a', 'b', 'c', 'd', 'hidpi', 'button-open', 'missing']
+    for exts in (['svg', 'png', 'xpm'], ['png', 'svg'], ['xpm']):
+        index = FlatIndex.build('flat-child', exts)
+        for name in names:
+            assert index.lookup(name) == lookup(name, 'flat-child', exts), (name, exts)
+
+    # Directory order comes before extension order
+    assert lookup('a', 'flat-child', flatten=True) == chain / 'icons/flat-child/16x16/apps/a.png'
+    assert lookup('button-open', 'flat-child', flatten=True) == chain / 'icons/hicolor/16x16/actions/button-open.svg'
+    assert lookup('d', 'flat-child', flatten=True) == chain / 'pixmaps/d.xpm'
+    # Sized lookups aren't answered from the index
+    assert lookup(Icon('a', size=48), 'flat-child', flatten=True) == chain / 'icons/flat-child/scalable/apps/a.svg'
+
+
+def test_rebuilt_when_changed(chain, monkeypatch):
+    index = get_flat_index('flat-child', ['svg'])
+    assert get_flat_index('flat-child', ['svg']) is index
+    assert len(index) == 3
+
+    (chain / 'pixmaps' / 'e.svg').touch()
+    monkeypatch.setattr('freedesktop_icons.theme.Theme.RESCAN_INTERVAL', 0)
+    assert get_flat_index('flat-child', ['svg']) is not index
+    assert lookup('e', 'flat-child', ['svg'], flatten=True) == chain / 'pixmaps/e.svg'
@@ -3,18 +3,32 @@ from unittest import mock
 
 import pytest
 
-from freedesktop_icons import Icon, Theme, lookup, lookup_fallback, theme_search_dirs
+from freedesktop_icons import (
+    DEFAULT_EXTENSIONS,
+    Icon,
+    Theme,
+    fallback_paths,
+    get_theme,
+    iter_icon_names,
+    list_themes,
+    lookup,
+    lookup_fallback,
+    set_fallback_paths,
+    theme_search_dirs,
+)
 
 
 @pytest.mark.parametrize(
-    ("env", "expected"),
+    ("env", "data_home", "expected"),
     (
-        ("", [Path.home() / '.icons']),
-        ("/foo:", [Path.home() / '.icons', Path('/foo/icons')]),
+        ("", "", [Path.home() / '.icons', Path.home() / '.local/share/icons', Path('/usr/local/share/icons'), Path('/usr/share/icons')]),
+        ("/foo:", "/data", [Path.home() / '.icons', Path('/data/icons'), Path('/foo/icons')]),
+        ("/foo:relative", "relative", [Path.home() / '.icons', Path.home() / '.local/share/icons', Path('/foo/icons')]),
     ),
 )
-def test_theme_search_dirs(env, expected, monkeypatch):
+def test_theme_search_dirs(env, data_home, expected, monkeypatch):
     monkeypatch.setenv('XDG_DATA_DIRS', env)
+    monkeypatch.setenv('XDG_DATA_HOME', data_home)
     assert list(theme_search_dirs()) == expected
 
 
@@ -89,7 +103,7 @@ def test_lookup_in_fallback(lookup_fallback, get_theme):
 
     path = lookup("org.mozilla.firefox", "Adwaita")
     assert get_theme.mock_calls == [mock.call('Adwaita'), mock.call('hicolor')]
-    assert lookup_fallback.mock_calls == [mock.call('org.mozilla.firefox', ['svg', 'png', 'xpm'])]
+    assert lookup_fallback.mock_calls == [mock.call('org.mozilla.firefox', DEFAULT_EXTENSIONS, None)]
     assert path is lookup_fallback.return_value
 
 
@@ -102,4 +116,110 @@ def test_lookup_fallback(fallback_paths, tmpdir):
 
     assert lookup_fallback("not-there", ['svg']) is None
     assert lookup_fallback("org.mozilla.firefox", ['png']) is None
-    assert lookup_fallback("org.mozilla.firefox", ['svg']) == file
+    assert lookup_fallback("org.mozilla.firefox", ['svg']) == Path(file)
+    assert lookup_fallback("org.mozilla.firefox", ['png', 'svg']) == Path(file)
+
+
+def test_lookup_fallback_refresh(tmp_path):
+    set_fallback_paths([tmp_path / "missing", tmp_path])
+    try:
+        assert lookup_fallback("org.mozilla.firefox", ['svg']) is None
+
+        (tmp_path / 'org.mozilla.firefox.svg').touch()
+        (tmp_path / 'not-an-icon').touch()
+        (tmp_path / 'subdir.svg').mkdir()
+        assert lookup_fallback("org.mozilla.firefox", ['svg']) == tmp_path / 'org.mozilla.firefox.svg'
+        assert lookup_fallback("subdir", ['svg']) is None
+    finally:
+        set_fallback_paths(None)
+
+
+@pytest.mark.parametrize(
+    ("env", "expected"),
+    (
+        ("", [Path('/usr/local/share/pixmaps'), Path('/usr/share/pixmaps')]),
+        ("/foo:/usr/share", [Path('/foo/pixmaps'), Path('/usr/share/pixmaps')]),
+    ),
+)
+def test_fallback_paths(env, expected, monkeypatch):
+    monkeypatch.setenv('XDG_DATA_DIRS', env)
+    assert list(fallback_paths()) == expected
+
+
+@mock.patch("freedesktop_icons.get_theme", autospec=True)
+@mock.patch("freedesktop_icons.lookup_fallback", autospec=True)
+def test_lookup_generic_in_fallback(lookup_fallback, get_theme):
+    theme = mock.create_autospec(Theme, name="theme")
+    theme.parents = []
+    theme.lookup.return_value = None
+    get_theme.return_value = theme
+    lookup_fallback.side_effect = [None, mock.sentinel.path]
+
+    path = lookup(Icon("network-wireless-signal", generic_fallback=True), "Adwaita")
+    assert lookup_fallback.mock_calls == [
+        mock.call('network-wireless-signal', DEFAULT_EXTENSIONS, None),
+        mock.call('network-wireless', DEFAULT_EXTENSIONS, None),
+    ]
+    assert path is mock.sentinel.path
+
+
+@mock.patch("freedesktop_icons.get_theme", autospec=True)
+def test_iter_icon_names(get_theme, tmp_path):
+    real_theme = mock.create_autospec(Theme, name="real_theme")
+    real_theme.parents = ['parent']
+    real_theme.iter_icon_names.return_value = iter(['edit-copy', 'edit-cut'])
+    parent_theme = mock.create_autospec(Theme, name="parent_theme")
+    parent_theme.iter_icon_names.return_value = iter(['edit-copy', 'edit-paste'])
+    hicolor = mock.create_autospec(Theme, name="hicolor")
+    hicolor.iter_icon_names.return_value = iter(['org.mozilla.firefox'])
+    (tmp_path / 'edit-cut.xpm').touch()
+    (tmp_path / 'xterm.xpm').touch()
+
+    _stub_get_theme(get_theme, Adwaita=real_theme, parent=parent_theme, hicolor=hicolor)
+    set_fallback_paths([tmp_path])
+    try:
+        names = iter_icon_names("Adwaita")
+        # Lazy: the first page doesn't need the parents
+        assert next(names) == 'edit-copy'
+        assert get_theme.mock_calls == [mock.call('Adwaita')]
+        assert list(names) == ['edit-cut', 'edit-paste', 'org.mozilla.firefox', 'xterm']
+    finally:
+        set_fallback_paths(None)
+
+
+def test_list_themes(xdg_data_dir, tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_DATA_DIRS', f'{tmp_path / "a"}:{tmp_path / "missing"}:{tmp_path / "b"}')
+
+    def write(root, name, index):
+        (tmp_path / root / 'icons' / name).mkdir(parents=True)
+        if index is not None:
+            (tmp_path / root / 'icons' / name / 'index.theme').write_text(index)
+
+    write('a', 'First', '[Icon Theme]\nName=First Theme\nInherits=Second,hicolor\nDirectories=16x16/apps,32x32/apps,\n[16x16/apps]\nSize=16\n')
+    # Only icons, the index.theme is in b
+    write('a', 'Second', None)
+    write('b', 'Second', '# Comment\n[Icon Theme]\nName=Second\nComment=The second\nHidden=true\n')
+    write('b', 'First', '[Icon Theme]\nName=Shadowed\n')
+    write('b', 'NotATheme', '[Something Else]\nName=Nope\n')
+    (tmp_path / 'b' / 'icons' / 'file').touch()
+
+    themes = list_themes()
+    assert [(info.name, info.display_name, info.inherits, info.num_directories, info.hidden) for info in themes] == [
+        ('First', 'First Theme', ['Second', 'hicolor'], 2, False),
+        ('Second', 'Second', [], 0, True),
+    ]
+    assert themes[0].path == tmp_path / 'a' / 'icons' / 'First'
+    assert themes[1].comment == 'The second'
+
+    theme = themes[0].load()
+    assert list(theme.parents) == ['Second']
+    assert theme is get_theme('First')
+
+
+def test_lookup_variants_in_fallback(xdg_data_dir, tmp_path):
+    set_fallback_paths([tmp_path])
+    (tmp_path / 'go-next.png').touch()
+    (tmp_path / 'go-next-symbolic.png').touch()
+
+    assert lookup(Icon('go-next', symbolic=True, direction='rtl'), 'hicolor') == tmp_path / 'go-next-symbolic.png'
+    assert lookup(Icon('go-next', direction='rtl'), 'hicolor') == tmp_path / 'go-next.png'
@@ -0,0 +1,58 @@
+import io
+import json
+
+import pytest
+
+from freedesktop_icons.__main__ import _shard, main, resolve
+from tests.utils import THEME_NAME
+
+
+def _specs(*specs):
+    return [json.dumps(spec) + "\n" for spec in specs]
+
+
+@pytest.mark.parametrize("jobs", [0, 2])
+def test_resolve(data_dir, jobs):
+    lines = _specs(
+        {"name": "button-open"},
+        {"name": "not-there", "size": 16},
+        {"name": "button-open", "size": 16, "context": "actions", "theme": THEME_NAME},
+    )
+
+    results = list(resolve(lines, theme=THEME_NAME, jobs=jobs, chunk_size=2))
+
+    assert [r["path"] for r in results] == [
+        str(data_dir / "16x16/actions/button-open.svg"),
+        None,
+        str(data_dir / "16x16/actions/button-open.svg"),
+    ]
+    assert results[1] == {"name": "not-there", "size": 16, "theme": THEME_NAME, "path": None}
+
+
+def test_resolve_bad_lines():
+    results = list(resolve(["[]\n", "{\n", '{"nme": "x"}\n', '{"name": "x"}\n'], jobs=0))
+
+    assert [r["line"] for r in results] == ["[]", "{", '{"nme": "x"}', '{"name": "x"}']
+    assert all("error" in r for r in results)
+
+
+def test_main_resolve(data_dir):
+    stdin = io.StringIO("".join(_specs({"name": "button-open"})) + "\n")
+    stdout = io.StringIO()
+
+    assert main(["resolve", "--jobs", "0", "--theme", THEME_NAME, "--extension", "png"], stdin, stdout) == 0
+    assert [json.loads(line) for line in stdout.getvalue().splitlines()] == [{"name": "button-open", "theme": THEME_NAME, "path": None}]
+
+
+@pytest.mark.parametrize("jobs", [0, 2])
+def test_resolve_bad_types(data_dir, jobs):
+    lines = _specs({"name": "x", "size": "16"}, {"name": "x", "size": True}, {"name": 1}, {"name": "button-open", "size": 16})
+
+    results = list(resolve(lines, theme=THEME_NAME, jobs=jobs))
+
+    assert [r.get("error") for r in results] == ["'size' must be int or null", "'size' must be int or null", "'name' must be str", None]
+    assert results[3]["path"] == str(data_dir / "16x16/actions/button-open.svg")
+
+
+def test_shard_spreads_one_theme():
+    assert sorted(_shard("Adwaita", 4, n) for n in range(4)) == [0, 1, 2, 3]
@@ -0,0 +1,62 @@
+import io
+import json
+from unittest import mock
+
+import pytest
+
+from freedesktop_icons import Icon
+from freedesktop_icons.__main__ import main
+from freedesktop_icons.manifest import ManifestResolver, build_manifest
+from tests.utils import THEME_NAME
+
+
+def test_build_and_resolve(data_dir):
+    manifest = build_manifest(["button-open", "not-there", "button-open"], THEME_NAME, sizes=[16, 24], scales=[1])
+    assert manifest["dirs"] == [f"{data_dir}/16x16/actions/"]
+    assert manifest["icons"] == {
+        "button-open": [[16, 1, 0, 0], [24, 1, 0, 0]],
+        "not-there": [[16, 1, -1, -1], [24, 1, -1, -1]],
+    }
+
+    resolver = ManifestResolver(json.loads(json.dumps(manifest)))
+    assert not resolver.stale
+    with mock.patch("freedesktop_icons.manifest.lookup", autospec=True) as lookup:
+        assert resolver.lookup(Icon("button-open", size=24)) == data_dir / "16x16/actions/button-open.svg"
+        assert resolver.lookup(Icon("not-there", size=16)) is None
+        assert lookup.mock_calls == []
+
+        # Not in the manifest
+        resolver.lookup("button-open")
+        resolver.lookup(Icon("button-open", size=24, context="actions"))
+        assert lookup.call_count == 2
+
+
+def test_stale(data_dir, tmp_path):
+    resolver = ManifestResolver(build_manifest(["button-open"], THEME_NAME, sizes=[16], scales=[1]))
+    assert not resolver.is_stale()
+
+    # A new base directory for one of the themes in the chain
+    (tmp_path / "home" / ".icons" / "hicolor").mkdir(parents=True)
+    assert resolver.is_stale()
+
+    resolver = ManifestResolver(resolver.manifest)
+    assert resolver.stale
+    with mock.patch("freedesktop_icons.manifest.lookup", autospec=True) as lookup:
+        resolver.lookup(Icon("button-open", size=16))
+        assert lookup.call_count == 1
+
+
+def test_bad_version():
+    with pytest.raises(ValueError, match="version"):
+        ManifestResolver({"version": 0})
+
+
+def test_main_manifest(data_dir, tmp_path):
+    output = tmp_path / "manifest.json"
+    stdin = io.StringIO("button-open\n\n")
+
+    assert main(["manifest", "--theme", THEME_NAME, "-o", str(output), "--size", "16", "--scale", "1", "--scale", "2"], stdin, io.StringIO()) == 0
+
+    resolver = ManifestResolver.load(output)
+    # No @2 directory, so the closest size is used
+    assert resolver.manifest["icons"] == {"button-open": [[16, 1, 0, 0], [16, 2, 0, 0]]}
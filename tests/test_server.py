@@ -0,0 +1,67 @@
+import socket
+import threading
+
+import pytest
+
+from freedesktop_icons import Icon, Theme
+from freedesktop_icons.cache import GtkIconCache, write_icon_cache
+from freedesktop_icons.server import Client, LookupServer
+from tests.utils import THEME_NAME
+
+
+@pytest.fixture
+def server(tmp_path):
+    socket_path = tmp_path / "lookup.sock"
+    # A stale socket left behind by a previous server should be replaced
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(socket_path))
+    stale.close()
+    with LookupServer(socket_path) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        thread.join()
+    assert not socket_path.exists()
+
+
+def test_lookup(data_dir, server):
+    expected = data_dir / "16x16/actions/button-open.svg"
+
+    with Client(server.socket_path) as client:
+        assert client.lookup("button-open", THEME_NAME) == expected
+        assert client.lookup_many([Icon("button-open", size=16), "not-there"], THEME_NAME, ["svg"]) == [expected, None]
+        assert client.lookup("button-open", THEME_NAME, ["png"]) is None
+        # Second request for the same icon is answered from the result cache
+        assert client.lookup("button-open", THEME_NAME) == expected
+
+    assert server.cache_info().hits == 1
+
+
+def test_bad_request(server):
+    with Client(server.socket_path) as client:
+        assert client._request({"theme": THEME_NAME, "icons": [{"nme": "x"}]})["error"].startswith("TypeError")
+        assert client._request({"icons": []})["error"].startswith("KeyError")
+        # Connection is still usable afterwards
+        assert client.lookup_many([], THEME_NAME) == []
+
+
+def test_installed_icon_is_found(xdg_data_dir, monkeypatch, server):
+    theme = xdg_data_dir / "icons" / "installed"
+    (theme / "16x16" / "apps").mkdir(parents=True)
+    (theme / "index.theme").write_text("[Icon Theme]\nDirectories=16x16/apps\n[16x16/apps]\nSize=16\n")
+    monkeypatch.setattr(Theme, "RESCAN_INTERVAL", 0)
+
+    with Client(server.socket_path) as client:
+        assert client.lookup("app", "installed") is None
+        (theme / "16x16" / "apps" / "app.png").touch()
+        # As gtk-update-icon-cache would, which changes the theme's generation
+        write_icon_cache(theme, {"app": [("16x16/apps", GtkIconCache.SUFFIX_FLAGS["png"])]})
+        assert client.lookup("app", "installed") == theme / "16x16" / "apps" / "app.png"
+
+
+def test_other_users_server_not_trusted(server, monkeypatch):
+    monkeypatch.setattr("os.getuid", lambda: 12345)
+    with Client(server.socket_path) as client:
+        with pytest.raises(PermissionError):
+            client.lookup("button-open", THEME_NAME)
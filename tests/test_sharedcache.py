@@ -0,0 +1,107 @@
+import multiprocessing
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+import freedesktop_icons
+from freedesktop_icons import Theme, lookup
+from freedesktop_icons.cache import GtkIconCache, write_icon_cache
+from freedesktop_icons.sharedcache import SharedResultCache
+
+
+@pytest.fixture
+def cache():
+    cache = SharedResultCache.create(num_slots=8, arena_size=256)
+    yield cache
+    cache.close()
+    cache.unlink()
+
+
+def test_get_set(cache):
+    assert cache.get("a") is None
+    cache.set("a", "/usr/share/icons/a.svg")
+    cache.set("b", "")
+    # Existing entries are never overwritten
+    cache.set("a", "/other")
+
+    assert cache.get("a") == "/usr/share/icons/a.svg"
+    assert cache.get("b") == ""
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_full(cache):
+    for i in range(8):
+        cache.set(f"key{i}", "value")
+
+    # Load factor caps the table at 6 of 8 slots
+    assert len(cache) == 6
+    assert cache.get("key7") is None
+
+    cache2 = SharedResultCache.create(num_slots=8, arena_size=16)
+    try:
+        cache2.set("k", "v" * 15)
+        cache2.set("k2", "v")
+        assert len(cache2) == 1
+        assert cache2.arena_used == 16
+    finally:
+        cache2.close()
+        cache2.unlink()
+
+
+def _worker(cache, queue):
+    queue.put(cache.get("from-parent"))
+    cache.set("from-child", "/child")
+
+
+def test_shared_across_fork(cache):
+    cache.set("from-parent", "/parent")
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_worker, args=(cache, queue))
+    proc.start()
+    proc.join()
+
+    assert queue.get() == "/parent"
+    assert cache.get("from-child") == "/child"
+
+
+@mock.patch("freedesktop_icons.get_theme", autospec=True)
+def test_lookup_uses_result_cache(get_theme, cache):
+    theme = mock.create_autospec(Theme, name="theme")
+    theme.parents = []
+    theme.lookup.return_value = Path("/icons/firefox.svg")
+    get_theme.return_value = theme
+
+    freedesktop_icons.set_result_cache(cache)
+    try:
+        assert lookup("org.mozilla.firefox", "Adwaita") == Path("/icons/firefox.svg")
+        assert lookup("org.mozilla.firefox", "Adwaita") == Path("/icons/firefox.svg")
+    finally:
+        freedesktop_icons.set_result_cache(None)
+
+    assert theme.lookup.call_count == 1
+    assert cache.hits == 1
+
+
+def test_installed_icon_is_found(xdg_data_dir, monkeypatch):
+    theme = xdg_data_dir / "icons" / "installed"
+    (theme / "16x16" / "apps").mkdir(parents=True)
+    (theme / "index.theme").write_text("[Icon Theme]\nDirectories=16x16/apps\n[16x16/apps]\nSize=16\n")
+    monkeypatch.setattr(Theme, "RESCAN_INTERVAL", 0)
+
+    cache = SharedResultCache.create(num_slots=8, arena_size=1024)
+    freedesktop_icons.set_result_cache(cache)
+    try:
+        assert lookup("app", "installed") is None
+        assert lookup("app", "installed") is None
+        assert cache.hits == 1
+        (theme / "16x16" / "apps" / "app.png").touch()
+        # As gtk-update-icon-cache would, which changes the theme's generation
+        write_icon_cache(theme, {"app": [("16x16/apps", GtkIconCache.SUFFIX_FLAGS["png"])]})
+        assert lookup("app", "installed") == theme / "16x16" / "apps" / "app.png"
+    finally:
+        freedesktop_icons.set_result_cache(None)
+        cache.close()
+        cache.unlink()
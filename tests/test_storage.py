@@ -0,0 +1,140 @@
+import os
+import pathlib
+import zipfile
+
+import pytest
+
+import freedesktop_icons
+from freedesktop_icons import Icon, add_theme_archive, get_theme, lookup
+from freedesktop_icons.cache import GtkIconCache, write_icon_cache
+from freedesktop_icons.storage import ZipStorage
+
+INDEX = """[Icon Theme]
+Name=Zipped
+Directories=16x16/apps,48x48/apps,scalable/apps
+[16x16/apps]
+Size=16
+Type=Fixed
+[48x48/apps]
+Size=48
+Type=Fixed
+[scalable/apps]
+Size=48
+Type=Scalable
+"""
+
+FILES = ['16x16/apps/a.png', '48x48/apps/a.png', '48x48/apps/b.png', 'scalable/apps/c.svg']
+
+
+def _write_archive(tmp_path, with_cache):
+    src = tmp_path / 'src' / 'zipped'
+    src.mkdir(parents=True)
+    (src / 'index.theme').write_text(INDEX)
+    for file in FILES:
+        (src / file).parent.mkdir(parents=True, exist_ok=True)
+        (src / file).write_text(file)
+    if with_cache:
+        icons: dict = {}
+        for file in FILES:
+            dirname, _, filename = file.rpartition('/')
+            name, _, ext = filename.partition('.')
+            icons.setdefault(name, []).append((dirname, GtkIconCache.SUFFIX_FLAGS[ext]))
+        write_icon_cache(src, icons)
+
+    archive = tmp_path / 'themes.zip'
+    with zipfile.ZipFile(archive, 'w') as zf:
+        for root, _, files in os.walk(src.parent):
+            for file in files:
+                path = pathlib.Path(root) / file
+                zf.write(path, path.relative_to(src.parent).as_posix())
+    return archive
+
+
+@pytest.fixture(params=[True, False], ids=['cache', 'nocache'])
+def archive(request, xdg_data_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(freedesktop_icons, '_theme_storages', {})
+    yield _write_archive(tmp_path, request.param)
+    # The archive's themes are cached by name
+    get_theme.cache_clear()
+
+
+def test_add_theme_archive(archive):
+    assert add_theme_archive(archive) == ['zipped']
+    assert get_theme('zipped').config['Icon Theme']['Name'] == 'Zipped'
+
+
+@pytest.mark.parametrize(
+    ["icon", "expected"],
+    [
+        ('a', 'zipped/16x16/apps/a.png'),
+        (Icon('a', size=48), 'zipped/48x48/apps/a.png'),
+        (Icon('b', size=16), 'zipped/48x48/apps/b.png'),
+        ('c', 'zipped/scalable/apps/c.svg'),
+    ],
+)
+def test_lookup(archive, icon, expected):
+    add_theme_archive(archive)
+    file = lookup(icon, 'zipped')
+    assert isinstance(file, zipfile.Path)
+    assert file.at == expected
+    assert file.read_text() == expected.partition('/')[2]
+
+
+def test_lookup_miss(archive):
+    add_theme_archive(archive)
+    assert lookup('missing', 'zipped') is None
+
+
+def test_lookup_flat(archive):
+    add_theme_archive(archive)
+    assert lookup('a', 'zipped', flatten=True).read_text() == '16x16/apps/a.png'
+
+
+def test_icon_names(archive):
+    add_theme_archive(archive)
+    assert get_theme('zipped').icon_names == {'a', 'b', 'c'}
+
+
+def test_storage_index(archive):
+    storage = ZipStorage(archive)
+    assert storage.subdirs('zipped/') == {'16x16', '48x48', 'scalable'}
+    assert storage.exists('zipped/16x16/apps/a.png')
+    assert not storage.exists('zipped/16x16/apps/b.png')
+    assert storage.mtime('zipped') == os.stat(archive).st_mtime_ns
+    assert storage.mtime('other') is None
+    with pytest.raises(FileNotFoundError):
+        storage.open_text('other/index.theme')
+
+
+def test_read_content(archive):
+    from freedesktop_icons.content import ContentCache
+
+    add_theme_archive(archive)
+    cache = ContentCache()
+    assert cache.read(lookup('a', 'zipped')) == b'16x16/apps/a.png'
+    assert cache.read(lookup('a', 'zipped')) == b'16x16/apps/a.png'
+    assert cache.cache_info().hits == 1
+
+
+def test_list_themes(archive):
+    add_theme_archive(archive)
+    (info,) = freedesktop_icons.list_themes()
+    assert (info.name, info.display_name, info.num_directories) == ('zipped', 'Zipped', 3)
+    assert info.load().storage is freedesktop_icons._theme_storages['zipped']
+
+
+def test_replaced_archive(archive, tmp_path):
+    add_theme_archive(archive)
+    old = lookup('a', 'zipped')
+
+    replacement = tmp_path / 'new.zip'
+    with zipfile.ZipFile(archive) as src, zipfile.ZipFile(replacement, 'w') as dst:
+        for info in src.infolist():
+            dst.writestr(info, b'new' if info.filename == 'zipped/16x16/apps/a.png' else src.read(info))
+    os.utime(replacement, ns=(os.stat(archive).st_mtime_ns + 10**9,) * 2)
+    os.replace(replacement, archive)
+    freedesktop_icons._theme_storages['zipped'].refresh()
+
+    assert lookup('a', 'zipped').read_bytes() == b'new'
+    # Paths from before the archive was replaced can still be read
+    assert old.read_text() == '16x16/apps/a.png'
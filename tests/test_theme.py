@@ -1,10 +1,11 @@
+import os
 import pathlib
 
 import attr
 import pytest
 
 from freedesktop_icons import icons
-from freedesktop_icons.cache import GtkIconCache
+from freedesktop_icons.cache import GtkIconCache, write_icon_cache
 from freedesktop_icons.theme import Theme, ThemeDirectory
 
 
@@ -157,3 +158,163 @@ def test_matches_icon(theme_directory, icon, should_match):
 )
 def test_size_diff(theme_directory, icon, expected):
     assert theme_directory.size_diff(icon) == expected
+
+
+def test_base_dirs(theme):
+    assert [base.path for base in theme.base_dirs] == [theme.theme_dir]
+    assert theme.base_dirs[0].subdirs == {'16x16/actions': f'{theme.theme_dir}/16x16/actions/'}
+
+
+@pytest.fixture
+def split_theme(tmp_path, monkeypatch):
+    # A theme split over two base directories, with only some sub-directories present in each
+    monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+    monkeypatch.setenv('XDG_DATA_DIRS', f'{tmp_path / "a"}:{tmp_path / "missing"}:{tmp_path / "b"}')
+    for base in ('a', 'b'):
+        (tmp_path / base / 'icons' / 'split').mkdir(parents=True)
+    (tmp_path / 'a' / 'icons' / 'split' / 'index.theme').write_text(
+        '[Icon Theme]\nDirectories=16x16/apps,scalable/apps\n[16x16/apps]\nSize=16\n[scalable/apps]\nSize=48\nType=Scalable\n'
+    )
+    (tmp_path / 'a' / 'icons' / 'split' / '16x16' / 'apps').mkdir(parents=True)
+    (tmp_path / 'b' / 'icons' / 'split' / 'scalable' / 'apps').mkdir(parents=True)
+    (tmp_path / 'b' / 'icons' / 'split' / 'scalable' / 'apps' / 'app.svg').touch()
+    return Theme('split')
+
+
+def test_base_dirs_split(split_theme, tmp_path):
+    assert [(base.path, set(base.subdirs)) for base in split_theme.base_dirs] == [
+        (tmp_path / 'a' / 'icons' / 'split', {'16x16/apps'}),
+        (tmp_path / 'b' / 'icons' / 'split', {'scalable/apps'}),
+    ]
+    assert split_theme.lookup(icons.Icon('app'), ['svg']) == tmp_path / 'b' / 'icons' / 'split' / 'scalable' / 'apps' / 'app.svg'
+
+
+def test_base_dirs_rescan(split_theme, tmp_path, monkeypatch):
+    assert len(split_theme.base_dirs) == 2
+    (tmp_path / 'a' / 'icons' / 'split' / 'scalable' / 'apps').mkdir(parents=True)
+
+    # Not re-checked until RESCAN_INTERVAL has passed
+    assert set(split_theme.base_dirs[0].subdirs) == {'16x16/apps'}
+
+    monkeypatch.setattr(Theme, 'RESCAN_INTERVAL', 0)
+    assert set(split_theme.base_dirs[0].subdirs) == {'16x16/apps', 'scalable/apps'}
+
+    monkeypatch.setattr(Theme, 'RESCAN_INTERVAL', 3600)
+    (tmp_path / 'b' / 'icons' / 'split' / 'scalable' / 'apps' / 'app.svg').unlink()
+    (tmp_path / 'b' / 'icons' / 'split' / 'scalable' / 'apps').rmdir()
+    split_theme.invalidate()
+    assert len(split_theme.base_dirs) == 1
+
+
+def test_icon_names(theme, split_theme):
+    # From the icon cache
+    assert theme.icon_names == {'button-open'}
+    # By listing the directories
+    assert split_theme.icon_names == {'app'}
+
+
+def test_lookup_generic_fallback(split_theme, tmp_path):
+    assert split_theme.lookup(icons.Icon('app-extra-thing'), ['svg']) is None
+    assert (
+        split_theme.lookup(icons.Icon('app-extra-thing', generic_fallback=True), ['svg'])
+        == tmp_path / 'b' / 'icons' / 'split' / 'scalable' / 'apps' / 'app.svg'
+    )
+    assert split_theme.lookup(icons.Icon('app-extra-thing', generic_fallback=True), ['png']) is None
+    assert split_theme.lookup(icons.Icon('ap-p', generic_fallback=True), ['svg']) is None
+
+
+def test_iter_icon_names(theme, split_theme):
+    assert list(theme.iter_icon_names()) == ['button-open']
+    assert list(theme.search('button-')) == ['button-open']
+    assert list(theme.search('app')) == []
+    assert list(split_theme.iter_icon_names()) == ['app']
+    # Once the index has been built it is used instead
+    assert split_theme.icon_names == {'app'}
+    assert list(split_theme.search('a')) == ['app']
+
+
+def test_merged_icon_caches(split_theme, tmp_path, monkeypatch):
+    a = tmp_path / 'a' / 'icons' / 'split'
+    b = tmp_path / 'b' / 'icons' / 'split'
+    (a / '16x16' / 'apps' / 'only-a.png').touch()
+    write_icon_cache(a, {'only-a': [('16x16/apps', GtkIconCache.SUFFIX_FLAGS['png'])]})
+    write_icon_cache(b, {'app': [('scalable/apps', GtkIconCache.SUFFIX_FLAGS['svg'])]})
+    split_theme.invalidate()
+
+    assert [base.cache is not None for base in split_theme.base_dirs] == [True, True]
+    assert split_theme.icon_names == {'app', 'only-a'}
+
+    # Every base directory has a cache, so no files need to be checked at all
+    monkeypatch.setattr('os.path.exists', None)
+    assert split_theme.lookup(icons.Icon('app'), ['png', 'svg']) == b / 'scalable' / 'apps' / 'app.svg'
+    assert split_theme.lookup(icons.Icon('only-a', size=16), ['svg', 'png']) == a / '16x16' / 'apps' / 'only-a.png'
+    assert split_theme.lookup(icons.Icon('app'), ['png']) is None
+
+
+def test_partial_icon_caches(split_theme, tmp_path):
+    a = tmp_path / 'a' / 'icons' / 'split'
+    b = tmp_path / 'b' / 'icons' / 'split'
+    write_icon_cache(a, {})
+    split_theme.invalidate()
+
+    assert [base.cache is not None for base in split_theme.base_dirs] == [True, False]
+    assert split_theme.icon_cache is split_theme.base_dirs[0].cache
+    # Only in the un-cached base directory
+    assert split_theme.lookup(icons.Icon('app'), ['svg']) == b / 'scalable' / 'apps' / 'app.svg'
+    assert split_theme.icon_names == {'app'}
+
+
+@pytest.mark.parametrize(
+    ["icon", "expected"],
+    [
+        (icons.Icon('go-next'), 'b/icons/split/scalable/apps/go-next.svg'),
+        (icons.Icon('go-next', direction='ltr'), 'b/icons/split/scalable/apps/go-next.svg'),
+        # A variant at the wrong size is still preferred
+        (icons.Icon('go-next', size=48, direction='rtl'), 'a/icons/split/16x16/apps/go-next-rtl.png'),
+        (icons.Icon('go-next', size=16, symbolic=True, direction='RTL'), 'b/icons/split/scalable/apps/go-next-symbolic.svg'),
+        (icons.Icon('go-next-symbolic', symbolic=True), 'b/icons/split/scalable/apps/go-next-symbolic.svg'),
+        (icons.Icon('go-previous', symbolic=True, direction='rtl'), None),
+    ],
+)
+def test_lookup_variants(split_theme, tmp_path, icon, expected):
+    (tmp_path / 'a' / 'icons' / 'split' / '16x16' / 'apps' / 'go-next-rtl.png').touch()
+    (tmp_path / 'b' / 'icons' / 'split' / 'scalable' / 'apps' / 'go-next.svg').touch()
+    (tmp_path / 'b' / 'icons' / 'split' / 'scalable' / 'apps' / 'go-next-symbolic.svg').touch()
+
+    assert split_theme.lookup(icon, ['svg', 'png']) == (expected and tmp_path / expected)
+
+
+def test_lookup_variants_cached(split_theme, tmp_path, monkeypatch):
+    a = tmp_path / 'a' / 'icons' / 'split'
+    b = tmp_path / 'b' / 'icons' / 'split'
+    write_icon_cache(a, {'go-next-symbolic': [('16x16/apps', GtkIconCache.SUFFIX_FLAGS['symbolic.png'])]})
+    write_icon_cache(b, {'go-next': [('scalable/apps', GtkIconCache.SUFFIX_FLAGS['svg'])]})
+    split_theme.invalidate()
+
+    # The caches say which variants exist, including pre-rendered symbolic PNGs, so no files need to be checked
+    monkeypatch.setattr('os.path.exists', None)
+    assert split_theme.lookup(icons.Icon('go-next', size=48, symbolic=True), ['svg', 'png']) == a / '16x16' / 'apps' / 'go-next-symbolic.symbolic.png'
+    assert split_theme.lookup(icons.Icon('go-next', size=48, direction='rtl'), ['svg', 'png']) == b / 'scalable' / 'apps' / 'go-next.svg'
+    assert split_theme.lookup(icons.Icon('go-previous', symbolic=True), ['svg', 'png']) is None
+    # A pre-rendered symbolic icon is a PNG, so isn't returned unless PNGs are asked for
+    assert split_theme.lookup(icons.Icon('go-next', size=48, symbolic=True), ['svg']) == b / 'scalable' / 'apps' / 'go-next.svg'
+
+
+def test_icon_direction():
+    with pytest.raises(ValueError):
+        icons.Icon('go-next', direction='up')
+
+
+def test_stale_icon_cache_ignored(split_theme, tmp_path):
+    a = tmp_path / 'a' / 'icons' / 'split'
+    write_icon_cache(a, {'gone': [('16x16/apps', GtkIconCache.SUFFIX_FLAGS['png'])]})
+    split_theme.invalidate()
+    assert split_theme.lookup(icons.Icon('gone'), ['png']) == a / '16x16' / 'apps' / 'gone.png'
+
+    # The cache is older than the directory, as if icons were removed without updating it
+    mtime = a.stat().st_mtime
+    os.utime(a / 'icon-theme.cache', (mtime - 10, mtime - 10))
+    split_theme.invalidate()
+    assert split_theme.base_dirs[0].cache is None
+    assert split_theme.lookup(icons.Icon('gone'), ['png']) is None
+    assert list(split_theme._default_icon_files(['png'])) == []
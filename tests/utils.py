@@ -0,0 +1,5 @@
+import pathlib
+
+TEST_THEME_DIR = pathlib.Path(__file__).parent / "data" / "test-theme"
+THEME_NAME = "freedesktop-icons-pytest-theme"
+"""Name the test theme is installed under by the ``data_dir`` fixture"""